@@ -0,0 +1,173 @@
+"""Vectorized board analysis over many boards at once, for analysis and bot tuning
+
+Boards are a stacked (B, H, W) uint8 array of 0/1 cells, row 0 at the top
+as in GameState.grid. Every function works on the whole stack with NumPy
+broadcasting and follows the scalar rules exactly: collisions as
+piece_fits(), landing rows as landing_row(), clears as clear_rows() and
+features and placement values as the bot's board_features() and value().
+
+Piece positions cover every column an orientation fits in, and rows from
+the spawn row (-1) down; placements drop straight from the spawn row.
+"""
+import numpy as np
+
+from bot import column_spans, default_weights, lost
+from engine import rotation_table
+
+feature_names = ('aggregate_height', 'holes', 'bumpiness', 'row_transitions')
+
+
+def boards_from_rows(rows_list, width):
+    """(B, H, W) uint8 boards from a list of bitboards, bit x of a row being column x"""
+    if width <= 62:
+        rows = np.array(rows_list, dtype=np.int64)
+        return ((rows[..., None] >> np.arange(width)) & 1).astype(np.uint8)
+    # Too wide for int64 rows, unpack bit by bit
+    return np.array([[[bits >> x & 1 for x in range(width)] for bits in rows] for rows in rows_list],
+                    dtype=np.uint8)
+
+
+def rows_from_boards(boards):
+    """Bitboards of a (B, H, W) stack, one list of row masks per board"""
+    weights = [1 << x for x in range(boards.shape[2])]
+    return [[sum(weight for weight, cell in zip(weights, row) if cell) for row in board.tolist()]
+            for board in boards]
+
+
+def column_heights(boards):
+    """(B, W) column heights, counted from the bottom to each column's top block"""
+    height = boards.shape[1]
+    return np.where(boards.any(axis=1), height - boards.argmax(axis=1), 0)
+
+
+def holes(boards):
+    """(B,) empty cells with a block somewhere above them in their column"""
+    covered = np.logical_or.accumulate(boards, axis=1)
+    return (covered & (boards == 0)).sum(axis=(1, 2))
+
+
+def row_transitions(boards):
+    """(B,) filled/empty changes along every row, the walls counting as filled"""
+    wall = np.ones(boards.shape[:2] + (1,), dtype=boards.dtype)
+    padded = np.concatenate((wall, boards, wall), axis=2)
+    return (padded[:, :, 1:] != padded[:, :, :-1]).sum(axis=(1, 2))
+
+
+def features(boards):
+    """(B, 4) int array of the feature_names of each board"""
+    heights = column_heights(boards)
+    bumpiness = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+    return np.column_stack((heights.sum(axis=1), holes(boards), bumpiness, row_transitions(boards)))
+
+
+def clear_lines(boards):
+    """(boards with full rows cleared, (B,) rows cleared), rows above moving down"""
+    full = boards.all(axis=2)
+    cleared = full.sum(axis=1)
+    result = boards.copy()
+    clearing = np.nonzero(cleared)[0]
+    if len(clearing):
+        # A stable sort puts each board's full rows first and keeps the others in order
+        order = np.argsort(~full[clearing], axis=1, kind='stable')
+        compacted = np.take_along_axis(boards[clearing], order[:, :, None], axis=1)
+        compacted[np.arange(boards.shape[1]) < cleared[clearing, None]] = 0
+        result[clearing] = compacted
+    return result, cleared
+
+
+def positions(piece, width, height):
+    """(xs, ys) covered by collision_masks(): every column the piece fits in, rows from -1 down"""
+    return np.arange(-piece.left, width - piece.right), np.arange(-1, height - piece.bottom)
+
+
+def collision_masks(boards, piece):
+    """(B, len(ys), len(xs)) bool, True where the orientation fits at (xs[j], ys[i])"""
+    count, height, width = boards.shape
+    xs, ys = positions(piece, width, height)
+    # A clear row above the board, where a piece at the spawn row can overhang
+    padded = np.concatenate((np.zeros((count, 1, width), dtype=bool), boards.astype(bool)), axis=1)
+    blocked = np.zeros((count, len(ys), len(xs)), dtype=bool)
+    for col, row in piece.cells:
+        left = col - piece.left
+        blocked |= padded[:, row:row + len(ys), left:left + len(xs)]
+    return ~blocked
+
+
+def landing_rows(boards, piece):
+    """((B, len(xs)) landing y of a piece dropped from the spawn row, (B, len(xs)) fits at spawn)"""
+    reach = np.logical_and.accumulate(collision_masks(boards, piece), axis=1)
+    return reach.sum(axis=1) - 2, reach[:, 0, :]
+
+
+def lock(boards, piece, xs, ys):
+    """(boards with the piece locked at (xs[b], ys[b]), (B,) True where it would top out)"""
+    result = boards.copy()
+    tops_out = np.zeros(len(boards), dtype=bool)
+    index = np.arange(len(boards))
+    for col, row in piece.cells:
+        rows = ys + row
+        inside = rows >= 0
+        tops_out |= ~inside
+        result[index[inside], rows[inside], xs[inside] + col] = 1
+    return result, tops_out
+
+
+def placement_values(boards, piece_id, weights=default_weights, chunk=4096):
+    """Bot value of every straight-drop placement of a piece on every board
+
+    Returns ((B, P) float values, P (rotation, x) placements), with lost
+    where the piece doesn't fit at the spawn row or tops out. Orientations
+    that repeat an earlier one are skipped, as in the bot's search.
+
+    As with placed_features(), placements that clear nothing only change
+    the piece's columns, so they are scored from the parent's heights and
+    holes; the few that clear rows are locked and scored in full. Boards
+    are evaluated chunk at a time, bounding memory at chunk * P heights.
+    """
+    w_height, w_lines, w_holes, w_bumpiness = weights
+    count, height, width = boards.shape
+    orientations, placements, seen = [], [], set()
+    for rotation, piece in enumerate(rotation_table[piece_id]):
+        if piece.matrix not in seen:
+            seen.add(piece.matrix)
+            xs, _ = positions(piece, width, height)
+            orientations.append((piece, xs))
+            placements.extend((rotation, int(x)) for x in xs)
+    values = np.empty((count, len(placements)))
+    for start in range(0, count, chunk):
+        part = boards[start:start + chunk]
+        parent_heights = column_heights(part)
+        parent_holes = holes(part)
+        row_counts = part.sum(axis=2)
+        full_rows = (row_counts == width).sum(axis=1)  # Already full, as lock_piece() counts them too
+        column = 0
+        for piece, xs in orientations:
+            landing, fits = landing_rows(part, piece)
+            tops_out = landing + min(row for _, row in piece.cells) < 0
+            index = np.arange(len(part))[:, None]
+            lines = np.repeat(full_rows[:, None], len(xs), axis=1)
+            for row, bits in enumerate(piece.row_masks):
+                if bits:
+                    filled = row_counts[index, np.maximum(landing + row, 0)] + bin(bits).count('1')
+                    lines += filled == width
+
+            heights = np.repeat(parent_heights[:, None], len(xs), axis=1)
+            hole_count = np.repeat(parent_holes[:, None], len(xs), axis=1)
+            places = np.arange(len(xs))
+            for col, top, bottom in column_spans[piece.matrix]:
+                old = heights[:, places, xs + col]
+                hole_count += height - 1 - (landing + bottom) - old
+                heights[:, places, xs + col] = height - (landing + top)
+
+            clearing = np.nonzero((lines > 0) & fits & ~tops_out)
+            if len(clearing[0]):
+                children, _ = lock(part[clearing[0]], piece, xs[clearing[1]], landing[clearing])
+                children, _ = clear_lines(children)
+                heights[clearing] = column_heights(children)
+                hole_count[clearing] = holes(children)
+            bumpiness = np.abs(np.diff(heights, axis=2)).sum(axis=2)
+            value = (w_height * heights.sum(axis=2) + w_lines * lines +
+                     w_holes * hole_count + w_bumpiness * bumpiness)
+            values[start:start + len(part), column:column + len(xs)] = np.where(fits & ~tops_out, value, lost)
+            column += len(xs)
+    return values, placements
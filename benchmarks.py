@@ -0,0 +1,697 @@
+"""Micro-benchmarks for the game's hot paths
+
+Usage: python benchmarks.py [name ...]   (runs every benchmark by default)
+"""
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import batch
+from bot import Bot, board_features, lost
+from engine import Action, GameMode, GameState, column_tops, landing_row, piece_fits, rotation_table
+from game_loop import FixedTimestep, percentile
+from input_queue import InputQueue
+from particles import ParticleSystem
+from pieces import generators
+from replay import Recorder, Replay
+from tournament import make_jobs, run_tournament
+from raster import midpoint_line, rasterize_segments
+
+
+def timed(func, repeat=5):
+    """Best wall-clock time of func() over a few runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def load_egl():
+    """The headless module, imported on first use
+
+    Importing it selects PyOpenGL's EGL platform, so only the rendering
+    benchmarks do.
+    """
+    import headless
+    return headless
+
+
+def bench_raster():
+    """Scalar midpoint_line vs the vectorized rasterize_segments"""
+    rng = random.Random(423)
+    print(f"{'segments':>10} {'points':>10} {'scalar ms':>10} {'batch ms':>10} {'speedup':>8}")
+    for n in (1, 100, 10000):
+        # Cell-sized segments, like the outlines the game draws
+        segments = []
+        for _ in range(n):
+            x, y = rng.randrange(0, 550), rng.randrange(0, 760)
+            segments.append((x, y, x + rng.randint(-35, 35), y + rng.randint(-35, 35)))
+        array = np.array(segments)
+
+        def scalar():
+            return [p for segment in segments for p in midpoint_line(*segment)]
+
+        expected = np.array(scalar(), dtype=np.float32)
+        assert np.array_equal(rasterize_segments(array), expected)
+        t_scalar = timed(scalar)
+        t_batch = timed(lambda: rasterize_segments(array))
+        print(f"{n:>10} {len(expected):>10} {t_scalar * 1e3:>10.3f} "
+              f"{t_batch * 1e3:>10.3f} {t_scalar / t_batch:>7.1f}x")
+
+
+def bench_engine():
+    """Headless GameState throughput on one core"""
+    policy = random.Random(423)
+    actions = [Action.LEFT, Action.RIGHT, Action.ROTATE, Action.DOWN, Action.DOWN]
+    games = steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < 3.0:
+        game = GameState(rng=random.Random(games))
+        while not game.game_over:
+            game.step(policy.choice(actions))
+            steps += 1
+        games += 1
+    elapsed = time.perf_counter() - start
+    print(f"{games} games, {steps} steps in {elapsed:.2f}s (random actions)")
+    print(f"{steps / elapsed:,.0f} steps/s, {games / elapsed:,.1f} games/s, "
+          f"{games / elapsed * 3600:,.0f} games/hour")
+
+
+def list_can_place_piece(grid, piece, x, y):
+    """The original list-of-lists collision check, kept as a reference"""
+    for row_idx, row in enumerate(piece):
+        for col_idx, cell in enumerate(row):
+            if cell:
+                new_x, new_y = x + col_idx, y + row_idx
+                if new_y >= len(grid):
+                    return False
+                if (new_x < 0 or new_x >= len(grid[0]) or
+                    (new_y >= 0 and grid[new_y][new_x])):
+                    return False
+    return True
+
+
+def list_clear_rows(grid):
+    """The original list-of-lists row clearing, kept as a reference"""
+    cleared_rows = 0
+    y = len(grid) - 1
+    while y >= 0:
+        if all(grid[y]):
+            cleared_rows += 1
+            del grid[y]
+            grid.insert(0, [0] * len(grid[0]))
+        else:
+            y -= 1
+    return cleared_rows
+
+
+def random_state(rng, full_rows=0):
+    """A GameState with a random, half-filled lower board, and that board as lists"""
+    game = GameState(rng=rng)
+    grid = [[0] * game.width for _ in range(game.height)]
+    for y in range(game.height // 2, game.height):
+        grid[y] = [int(rng.random() < 0.6) for _ in range(game.width)]
+    for y in rng.sample(range(game.height // 2, game.height), full_rows):
+        grid[y] = [1] * game.width
+    game.rows = [sum(cell << x for x, cell in enumerate(row)) for row in grid]
+    return game, grid
+
+
+def bench_bitboard():
+    """Bitboard rows vs list-of-lists for collision checks and row clears"""
+    rng = random.Random(423)
+    game, grid = random_state(rng)
+    pieces = [piece for orientations in rotation_table for piece in orientations]
+    queries = [(rng.choice(pieces), rng.randint(-2, 9), rng.randint(-1, 19))
+               for _ in range(20000)]
+    for piece, x, y in queries:
+        assert game.can_place_piece(piece, x, y) == list_can_place_piece(grid, piece.matrix, x, y)
+
+    t_list = timed(lambda: [list_can_place_piece(grid, p.matrix, x, y) for p, x, y in queries])
+    t_bits = timed(lambda: [game.can_place_piece(p, x, y) for p, x, y in queries])
+    print(f"collision: list {len(queries) / t_list:,.0f}/s, "
+          f"bitboard {len(queries) / t_bits:,.0f}/s ({t_list / t_bits:.1f}x)")
+
+    # Most placements clear nothing, so time that case apart from real clears
+    for label, full_rows in (("no full rows", (0, 0)), ("1-4 full rows", (1, 4))):
+        states, grids = zip(*(random_state(rng, full_rows=rng.randint(*full_rows))
+                              for _ in range(2000)))
+        boards = [(state.rows, grid) for state, grid in zip(states, grids)]
+
+        # Neither version mutates row contents, so a shallow copy gives each
+        # repeat a fresh board
+        def clear_lists():
+            for _, grid in boards:
+                list_clear_rows(grid[:])
+
+        def clear_bits():
+            for state, (rows, _) in zip(states, boards):
+                state.rows = rows[:]
+                state.clear_rows()
+
+        t_list = timed(clear_lists)
+        t_bits = timed(clear_bits)
+        print(f"clear_rows, {label}: list {len(boards) / t_list:,.0f}/s, "
+              f"bitboard {len(boards) / t_bits:,.0f}/s ({t_list / t_bits:.1f}x)")
+
+def scan_clear_rows(rows, full_row):
+    """The previous clear_rows(): compare every row, then rebuild the whole list"""
+    cleared = rows.count(full_row)
+    if cleared:
+        rows[:] = [0] * cleared + [bits for bits in rows if bits != full_row]
+    return cleared
+
+
+def bench_clears():
+    """Row clearing on tall boards: whole-board scan vs the rows a vertical I landed in"""
+    rng = random.Random(423)
+    repeat, count = 5, 1000
+    for height in (20, 100, 400):
+        for label, quad in (("no clear", False), ("quad clear", True)):
+            game = GameState(10, height)
+            full_row = game.full_row
+            touched = range(height - 4, height)
+            boards = []
+            for _ in range(count):
+                # A random stack over four rows with column 0 open, one more hole
+                # unless they are about to clear, and the I piece locked into it
+                stack = rng.randint(0, 12)
+                bottom = full_row if quad else full_row & ~(1 << rng.randint(1, 9))
+                rows = ([0] * (height - 4 - stack) + [rng.getrandbits(9) << 1 for _ in range(stack)] +
+                        [bottom] * 4)
+                top = height - 4 - stack
+                boards.append((rows, top, column_tops(rows, game.width, top)))
+            copies = [[(rows[:], top, tops[:]) for rows, top, tops in boards] for _ in range(repeat)]
+            expected = []
+            for rows, _, _ in boards:
+                rows = rows[:]
+                scan_clear_rows(rows, full_row)
+                expected.append(rows)
+
+            def scan():
+                for rows, _, _ in copies.pop():
+                    scan_clear_rows(rows, full_row)
+
+            def touched_rows():
+                # A consistent board, as place_piece() leaves it, so tops is updated in place
+                for rows, top, tops in copies.pop():
+                    game.rows, game.top, game.cached_tops = rows, top, tops
+                    game.clear_rows(touched)
+
+            t_scan = timed(scan, repeat)
+            copies = [[(rows[:], top, tops[:]) for rows, top, tops in boards] for _ in range(repeat)]
+            results = copies[0]
+            t_touched = timed(touched_rows, repeat)
+            assert [rows for rows, _, _ in results] == expected
+            assert all(tops == column_tops(rows, game.width) for rows, _, tops in results)
+            print(f"height {height:3}, {label:10}: scan {count / t_scan:9,.0f}/s, "
+                  f"touched rows {count / t_touched:9,.0f}/s ({t_scan / t_touched:.1f}x)")
+
+
+def step_landing_row(rows, width, height, piece, x, y):
+    """The previous landing search: one collision check per row fallen"""
+    while piece_fits(rows, width, height, piece, x, y + 1):
+        y += 1
+    return y
+
+
+def bench_drops():
+    """Landing row from the spawn row: stepping down vs the column height map"""
+    rng = random.Random(423)
+    pieces = [piece for orientations in rotation_table for piece in orientations]
+    for height in (20, 100, 400):
+        game = GameState(10, height, rng=rng)
+        width = game.width
+        queries = []
+        for _ in range(200):
+            # A ragged stack of up to 12 rows, each with a hole or two
+            stack = rng.randint(0, 12)
+            rows = [0] * (height - stack) + [game.full_row & ~(1 << rng.randrange(width)) & ~(1 << rng.randrange(width))
+                                             for _ in range(stack)]
+            tops = column_tops(rows, width)
+            for piece in rng.sample(pieces, 5):
+                x = rng.randint(-piece.left, width - 1 - piece.right)
+                queries.append((rows, tops, piece, x))
+        for rows, tops, piece, x in queries:
+            assert landing_row(rows, tops, width, height, piece, x, -1) == \
+                step_landing_row(rows, width, height, piece, x, -1)
+
+        t_step = timed(lambda: [step_landing_row(rows, width, height, piece, x, -1)
+                                for rows, _, piece, x in queries])
+        t_map = timed(lambda: [landing_row(rows, tops, width, height, piece, x, -1)
+                               for rows, tops, piece, x in queries])
+        print(f"height {height:3}: stepping {len(queries) / t_step:10,.0f}/s, "
+              f"height map {len(queries) / t_map:10,.0f}/s ({t_step / t_map:.1f}x)")
+
+
+def bench_pieces():
+    """Piece generators: dealing speed, and how long a piece can go missing"""
+    count = 200000
+    rng = random.Random(423)
+    t_direct = timed(lambda: [rng.randrange(7) for _ in range(count)])
+    print(f"{'randrange per spawn':>20}: {count / t_direct:12,.0f} pieces/s")
+    for name, generator in generators.items():
+        def deal():
+            pop = generator(random.Random(423)).pop
+            return [pop() for _ in range(count)]
+
+        elapsed = timed(deal)
+        pieces = deal()
+        last_seen = [-1] * 7
+        droughts = []  # Pieces dealt between two of the same kind
+        for index, piece_id in enumerate(pieces):
+            droughts.append(index - last_seen[piece_id] - 1)
+            last_seen[piece_id] = index
+        repeats = sum(a == b for a, b in zip(pieces, pieces[1:])) / (count - 1)
+        print(f"{name:>20}: {count / elapsed:12,.0f} pieces/s, drought mean {statistics.fmean(droughts):.1f}, "
+              f"p99 {percentile(droughts, 0.99)}, max {max(droughts)}, repeats {repeats:.1%}")
+
+
+def scalar_placement_values(bot, rows, width, height, piece_id):
+    """The values batch.placement_values() gives one board, one placement at a time"""
+    tops = column_tops(rows, width)
+    features = bot.features(rows, width)
+    values, seen = [], set()
+    for piece in rotation_table[piece_id]:
+        if piece.matrix in seen:
+            continue
+        seen.add(piece.matrix)
+        for x in range(-piece.left, width - piece.right):
+            child = None
+            if piece_fits(rows, width, height, piece, x, -1):
+                y = landing_row(rows, tops, width, height, piece, x, -1)
+                child = bot.child(rows, features, piece, x, y, width, height)
+            values.append(lost if child is None else bot.value(child[1], child[2]))
+    return values
+
+
+def bench_batch():
+    """Batched NumPy board evaluation vs the scalar rules, at 1, 1k and 100k boards"""
+    np_rng = np.random.default_rng(423)
+    width, height = 10, 20
+    pieces = [piece for orientations in rotation_table for piece in orientations]
+    bot = Bot(depth=1)
+    for count in (1, 1000, 100000):
+        # Random boards with their lower half 60% full, and copies with a few full rows to clear
+        boards = np.zeros((count, height, width), dtype=np.uint8)
+        boards[:, height // 2:] = np_rng.random((count, height - height // 2, width)) < 0.6
+        clearing = boards.copy()
+        clearing[np_rng.random((count, height)) < 0.05] = 1
+        # The scalar versions take long enough that a sample gives their rate
+        sample = batch.rows_from_boards(boards[:1000])
+        clearing_sample = batch.rows_from_boards(clearing[:1000])
+        full_row = (1 << width) - 1
+        values, _ = batch.placement_values(boards[:len(sample)], 6)
+        assert values.tolist() == [scalar_placement_values(bot, rows, width, height, 6) for rows in sample]
+
+        print(f"{count:,} boards:")
+        for label, batched, scalar in (
+                ("features", lambda: batch.features(boards),
+                 lambda: [board_features(rows, width) for rows in sample]),
+                ("clear_lines", lambda: batch.clear_lines(clearing),
+                 lambda: [[0] * rows.count(full_row) + [bits for bits in rows if bits != full_row]
+                          for rows in clearing_sample]),
+                ("collision masks", lambda: [batch.collision_masks(boards, piece) for piece in pieces],
+                 lambda: [[piece_fits(rows, width, height, piece, x, y)
+                           for piece in pieces for x in range(-piece.left, width - piece.right)
+                           for y in range(-1, height - piece.bottom)] for rows in sample]),
+                ("J placement values", lambda: batch.placement_values(boards, 6),
+                 lambda: [scalar_placement_values(bot, rows, width, height, 6) for rows in sample])):
+            repeat = 1 if count > 1000 else 5
+            t_batch = timed(batched, repeat)
+            t_scalar = timed(scalar, repeat) / len(sample)
+            print(f"{label:>20}: batch {count / t_batch:12,.0f} boards/s, "
+                  f"scalar {1 / t_scalar:10,.0f} boards/s ({t_scalar * count / t_batch:6.1f}x)")
+
+
+def bench_loop():
+    """Fixed-timestep pacing at 60 FPS for each game mode's gravity interval"""
+    for mode, interval_ms in (("EASY", 500), ("MEDIUM", 300), ("HARD", 100)):
+        loop = FixedTimestep(interval_ms / 1000.0)
+        game = GameState(rng=random.Random(423))
+        deadline = time.perf_counter() + 1.5
+        while time.perf_counter() < deadline:
+            _, ticks = loop.begin_frame()
+            for _ in range(ticks):
+                game.step(Action.DOWN)
+                if game.game_over:
+                    game.reset()
+            time.sleep(1 / 60)
+        print(f"{mode:>6}: {loop.summary()}")
+
+
+def bench_particles():
+    """ParticleSystem emit and per-frame update cost at 1k, 10k and 100k particles"""
+    ranges = dict(radius=(40, 160), speed=(10, 40), lifetime=(0.0, 1.0),
+                  color=((0.5, 0.5, 0.5), (1.0, 1.0, 1.0)))
+    print(f"{'particles':>10} {'emit us':>10} {'update us':>10} {'update us/1k':>13}")
+    for n in (1000, 10000, 100000):
+        system = ParticleSystem(budget=n, seed=423)
+
+        def emit():
+            system.clear()
+            system.emit(n, (275, 380), **ranges)
+
+        t_emit = timed(emit)
+
+        # One 60 FPS frame, during which a few percent of the particles expire
+        def update():
+            system.update(1 / 60)
+
+        t_update = 0.0
+        for _ in range(5):
+            emit()
+            t_update += timed(update, repeat=1)
+        t_update /= 5
+        print(f"{n:>10} {t_emit * 1e6:>10.0f} {t_update * 1e6:>10.0f} "
+              f"{t_update * 1e6 / (n / 1000):>13.1f}")
+
+
+def bench_replay():
+    """Replay speed of recorded games against their real-time length"""
+    policy = random.Random(423)
+    actions = [Action.LEFT, Action.RIGHT, Action.ROTATE, Action.DOWN, Action.DOWN]
+    recordings = []
+    for seed in range(50):
+        # MEDIUM gravity every 300 ms, with a keypress or two in between
+        now = [0.0]
+        game = GameState(seed=seed)
+        recorder = Recorder(seed, clock=lambda: now[0])
+        while not game.game_over:
+            action = policy.choice(actions)
+            now[0] += 0.3 if action is Action.DOWN else 0.1
+            recorder.record(action)
+            game.step(action)
+        recordings.append((recorder.to_bytes(), game.score, game.rows))
+
+    replays = [Replay.from_bytes(data) for data, _, _ in recordings]
+    for replay, (_, score, rows) in zip(replays, recordings):
+        final = replay.run()
+        assert (final.score, final.rows) == (score, rows)
+    size = sum(len(data) for data, _, _ in recordings)
+    steps = sum(len(replay.actions) for replay in replays)
+    real_time = sum(replay.duration for replay in replays)
+    print(f"{len(replays)} games, {steps} actions, {real_time / 60:.1f} min of play, "
+          f"{size / steps:.2f} bytes/action")
+
+    def replay_all():
+        for data, _, _ in recordings:
+            Replay.from_bytes(data).run()
+
+    elapsed = timed(replay_all, repeat=3)
+    print(f"decode + full replay: {elapsed * 1e3:.1f} ms, {steps / elapsed:,.0f} actions/s, "
+          f"{real_time / elapsed:,.0f}x real time")
+
+    longest = max(replays, key=lambda replay: len(replay.actions))
+    longest.run()  # Passing through leaves a snapshot every 1000 ticks
+    ticks = [policy.randrange(len(longest.actions)) for _ in range(100)]
+    elapsed = timed(lambda: [longest.seek(tick) for tick in ticks], repeat=3)
+    print(f"random seek in a {len(longest.actions)}-action game: "
+          f"{elapsed / len(ticks) * 1e3:.2f} ms per seek")
+
+
+def bench_bot():
+    """Auto-player decision time and play strength per search depth"""
+    budget = 0.1  # HARD mode's gravity interval
+    seeds = 5
+    for depth in (1, 2):
+        bot = Bot(depth=depth)
+        pieces = lines = 0
+        start = time.perf_counter()
+        for seed in range(seeds):
+            game = GameState(seed=seed)
+            while not game.game_over and game.pieces < 300:
+                bot.play_piece(game)
+            pieces += game.pieces
+            lines += game.lines
+        elapsed = time.perf_counter() - start
+        per_piece = elapsed / pieces
+        print(f"depth {depth}: {per_piece * 1e3:.2f} ms/decision "
+              f"({per_piece / budget:.0%} of a HARD tick), {lines / seeds:.0f} lines/game, "
+              f"{bot.evaluated / elapsed:,.0f} boards/s")
+
+
+def bench_cache():
+    """Bot feature cache: hit rates per search depth, and a memory cap over a long session"""
+    for depth, max_pieces in ((1, 300), (2, 300), (3, 20)):
+        bot = Bot(depth=depth)
+        game = GameState(seed=0)
+        start = time.perf_counter()
+        while not game.game_over and game.pieces < max_pieces:
+            bot.play_piece(game)
+        per_piece = (time.perf_counter() - start) / game.pieces
+        print(f"depth {depth}: {per_piece * 1e3:6.2f} ms/decision, {bot.cache.summary()}")
+
+    # The same games with the cache capped at 1 MiB play identically, in bounded memory
+    for cache_bytes in (64 << 20, 1 << 20):
+        bot = Bot(depth=2, cache_bytes=cache_bytes)
+        lines = 0
+        start = time.perf_counter()
+        for seed in range(5):
+            game = GameState(seed=seed)
+            while not game.game_over and game.pieces < 300:
+                bot.play_piece(game)
+            lines += game.lines
+        print(f"{cache_bytes >> 20:2} MiB cap: {time.perf_counter() - start:.1f}s, {lines} lines, "
+              f"{bot.cache.summary()}")
+
+
+def bench_tournament():
+    """Tournament throughput as worker processes are added"""
+    jobs = make_jobs(24, [GameMode.HARD], max_pieces=100)
+    cores = os.cpu_count()
+    counts = sorted({1, cores} | {count for count in (2, 4, 8) if count < cores})
+    baseline = None
+    for workers in counts:
+        start = time.perf_counter()
+        results = run_tournament(jobs, 'bot', workers=workers)
+        rate = len(results) / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{workers} workers: {rate:.1f} games/s, {rate / baseline:.2f}x "
+              f"({rate / baseline / workers:.0%} of linear)")
+
+
+def bench_render():
+    """Offscreen frames/s of the game's display() per renderer, through EGL"""
+    headless = load_egl()
+
+    game = headless.load_game()
+    headless.create_context(game.window_width, game.window_height)
+    for name, layered, frames, elapsed in headless.benchmark(game):
+        print(f"{name} renderer, {'offscreen layer' if layered else 'full repaint'}: "
+              f"{frames / elapsed:.0f} frames/s ({elapsed / frames * 1e3:.2f} ms/frame)")
+
+
+def bench_input():
+    """Input-to-photon latency in HARD mode as keypress storms grow, at 60 frames/s"""
+    headless = load_egl()
+
+    game = headless.load_game()
+    headless.create_context(game.window_width, game.window_height)
+    frame_interval = 1 / game.target_fps
+    for storm in (1, 10, 100):
+        headless.start_game(game, seed=1)
+        game.current_mode = GameMode.HARD
+        game.start_game_loop()
+        game.input_queue = InputQueue(history=storm * 120)
+        frame_times = []
+        next_frame = time.perf_counter()
+        for frame in range(120):
+            # The storm arrives just after a frame, the worst time for latency
+            for index in range(storm):
+                key = b'ad'[index % 2:index % 2 + 1]
+                game.handle_keyboard(key, 0, 0)
+                game.handle_keyboard_up(key, 0, 0)
+            next_frame += frame_interval
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+            start = time.perf_counter()
+            game.update(0)
+            game.view.display()
+            headless.glFinish()
+            frame_times.append(time.perf_counter() - start)
+        latencies = game.input_queue.latencies
+        print(f"{storm:3} keys/frame: frame p95 {percentile(frame_times, 0.95) * 1e3:5.2f} ms, "
+              f"latency p50 {percentile(latencies, 0.5) * 1e3:5.1f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1e3:5.1f} ms")
+
+
+# Startup paths timed by bench_startup, each in a fresh interpreter
+load_script = ("import importlib.util, sys; "
+               "spec = importlib.util.spec_from_file_location('tetris_game', 'Tetris Game.py'); "
+               "game = importlib.util.module_from_spec(spec); sys.modules[spec.name] = game; "
+               "spec.loader.exec_module(game)")
+startup_paths = [
+    ("game logic", "import engine, bot, scores, replay, tournament", {}),
+    ("game script", load_script, {}),
+    ("graphics", load_script + "; game.load_graphics()", {}),
+    ("graphics, no GL checks", load_script + "; game.load_graphics()", {'TETRIS_GL_CHECKS': '0'}),
+]
+gl_call_script = """
+import time, headless
+headless.create_context(64, 64)
+from OpenGL.GL import glColor3f
+start = time.perf_counter()
+for _ in range(100000):
+    glColor3f(1.0, 1.0, 1.0)
+print(time.perf_counter() - start)
+"""
+
+
+def import_times(code, env):
+    """{top-level module: cumulative import microseconds} of running code in a new interpreter"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code + "\nimport sys; print(sorted(sys.modules))"],
+                            env={**os.environ, **env}, capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and not line.endswith('imported package'):
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if not name[1:].startswith(' '):  # Nested imports are indented
+                times[name.strip()] = int(cumulative)
+    return times, 'OpenGL' in result.stdout
+
+
+def bench_startup():
+    """Import time of the game logic and the graphics stack (python -X importtime)"""
+    for label, code, env in startup_paths:
+        runs = [import_times(code, env) for _ in range(5)]
+        times, loads_gl = min(runs, key=lambda run: sum(run[0].values()))
+        top = sorted(times.items(), key=lambda item: -item[1])[:3]
+        print(f"{label:22}: {sum(times.values()) / 1e3:6.1f} ms, OpenGL {'loaded' if loads_gl else 'not loaded'}; "
+              + ", ".join(f"{name} {us / 1e3:.1f}" for name, us in top))
+    for checks in ('1', '0'):
+        seconds = min(float(subprocess.run([sys.executable, '-c', gl_call_script], capture_output=True,
+                                           text=True, check=True, env={**os.environ, 'TETRIS_GL_CHECKS': checks},
+                                           cwd=os.path.dirname(os.path.abspath(__file__))).stdout)
+                      for _ in range(3))
+        print(f"glColor3f with TETRIS_GL_CHECKS={checks}: {seconds / 100000 * 1e6:.2f} us/call")
+
+
+def bench_scenes():
+    """Menu/game switches in one shared context vs a new context and resources per switch"""
+    headless = load_egl()
+
+    game = headless.load_game()
+    size = (max(game.window_width, game.view.menu_size[0]), max(game.window_height, game.view.menu_size[1]))
+    headless.create_context(*size)
+    game.view.init()
+    game.view.create_board_layer()
+    switches = 20
+
+    def shared():
+        for _ in range(switches // 2):
+            game.start_game()
+            game.view.display_scene()
+            headless.glFinish()
+            game.view.switch_scene('menu')
+            game.view.display_scene()
+            headless.glFinish()
+
+    # What destroying and creating windows cost before, less the window
+    # system's own work: a new context, renderer, text lists and board layer
+    def recreated():
+        for _ in range(switches // 2):
+            headless.create_context(*size)
+            game.view.text_lists.clear()
+            game.view.init()
+            game.view.create_board_layer()
+            game.start_game()
+            game.view.display_scene()
+            headless.glFinish()
+            headless.create_context(*size)
+            game.view.text_lists.clear()
+            game.view.init()
+            game.view.switch_scene('menu')
+            game.view.display_scene()
+            headless.glFinish()
+
+    t_shared = timed(shared, repeat=3) / switches
+    t_recreated = timed(recreated, repeat=3) / switches
+    frame = 1 / game.target_fps
+    print(f"shared context: {t_shared * 1e3:.2f} ms per switch ({t_shared / frame:.0%} of a frame), "
+          f"new context: {t_recreated * 1e3:.2f} ms ({t_recreated / t_shared:.1f}x)")
+
+
+def bench_boards():
+    """Tick and frame time as the board grows, with the bot playing 60 pieces"""
+    headless = load_egl()
+
+    game = headless.load_game()
+    sizes = [(10, 20), (20, 40), (50, 100), (100, 200), (200, 400)]
+    windows = []
+    for size in sizes:
+        game.configure_board(*size)
+        windows.append((game.window_width, game.window_height))
+    headless.create_context(max(width for width, _ in windows), max(height for _, height in windows))
+
+    baseline = None
+    for width, height in sizes:
+        game.configure_board(width, height)
+        headless.start_game(game, seed=1)
+        bot = Bot(depth=1)
+        ticks = frames = 0
+        tick_time = frame_time = 0.0
+        while game.game.pieces < 60 and not game.game.game_over:
+            placed = game.game.pieces
+            actions = bot.plan(game.game)
+            while game.game.pieces == placed and not game.game.game_over:
+                start = time.perf_counter()
+                game.apply_action(actions.pop(0) if actions else Action.DOWN)
+                tick_time += time.perf_counter() - start
+                ticks += 1
+                # Every frame after a lock, where the layer repaints, and every 8th one while falling
+                if game.game.pieces != placed or ticks % 8 == 0:
+                    start = time.perf_counter()
+                    game.view.display()
+                    headless.glFinish()
+                    frame_time += time.perf_counter() - start
+                    frames += 1
+        tick, frame = tick_time / ticks, frame_time / frames
+        baseline = baseline or (width * height, tick, frame)
+        print(f"{width:3}x{height:<3} ({width * height / baseline[0]:4.0f}x area, "
+              f"{len(game.game.occupied_cells()):3} blocks, {game.cell_size}px cells): "
+              f"tick {tick * 1e6:5.1f} us ({tick / baseline[1]:.1f}x), "
+              f"frame {frame * 1e3:5.2f} ms ({frame / baseline[2]:.1f}x)")
+
+
+BENCHMARKS = {
+    'raster': bench_raster,
+    'engine': bench_engine,
+    'bitboard': bench_bitboard,
+    'clears': bench_clears,
+    'drops': bench_drops,
+    'pieces': bench_pieces,
+    'batch': bench_batch,
+    'loop': bench_loop,
+    'particles': bench_particles,
+    'replay': bench_replay,
+    'bot': bench_bot,
+    'cache': bench_cache,
+    'tournament': bench_tournament,
+    'render': bench_render,
+    'input': bench_input,
+    'scenes': bench_scenes,
+    'boards': bench_boards,
+    'startup': bench_startup,
+}
+
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            sys.exit(f"unknown benchmark {name!r}, choose from: {', '.join(BENCHMARKS)}")
+        print(f"== {name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main()
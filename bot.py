@@ -0,0 +1,259 @@
+"""Heuristic auto-player: placement search with next-piece lookahead
+
+For every reachable (rotation, column) of the falling piece the bot drops
+it on a copy of the bitboard, clears full rows and scores the result with
+the usual four features: aggregate height, lines cleared, holes and
+bumpiness. Deeper searches try every placement of the following pieces
+on each resulting board, taken from the game's preview queue, and
+average over all seven shapes where it runs out.
+
+Boards scored from scratch, after a clear, are kept in a bounded LRU
+cache. Search values are not: only about 5% of the (board, piece) pairs
+a depth 2 or 3 search expands come up again, in that search or on later
+moves, too few to pay for hashing every board.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from engine import Action, column_tops, landing_row, piece_fits, rotation_table, spawn_position
+from transposition import TranspositionCache, deep_sizeof
+
+# Weights for (aggregate height, lines, holes, bumpiness)
+default_weights = (-0.510066, 0.760666, -0.35663, -0.184483)
+lost = float('-inf')  # Value of a placement that tops out
+
+
+@lru_cache(maxsize=None)
+def features_entry_size(width, height):
+    """Bytes per cached board_features() entry, keyed by a row tuple"""
+    full_row = (1 << width) - 1
+    return deep_sizeof((full_row,) * height) + deep_sizeof(([height] * width, 0))
+
+
+def reachable_placements(rows, width, height, piece_id, rotation, x, y):
+    """(rotations, x, landing y, orientation) for every spot the piece can reach
+
+    Like the player, the bot first rotates in place, then slides along the
+    current row and then drops straight down. Rotations and slides stop at
+    the first position that doesn't fit, just as the game's moves do.
+    """
+    orientations = rotation_table[piece_id]
+    tops = column_tops(rows, width)
+    placements = []
+    seen = set()
+    for turns in range(4):
+        piece = orientations[(rotation + turns) % 4]
+        if not piece_fits(rows, width, height, piece, x, y):
+            break
+        if piece.matrix in seen:  # O, S, Z and I repeat their orientations
+            continue
+        seen.add(piece.matrix)
+        for step in (-1, 1):
+            target = x if step < 0 else x + 1
+            while piece_fits(rows, width, height, piece, target, y):
+                placements.append((turns, target, landing_row(rows, tops, width, height, piece, target, y),
+                                   piece))
+                target += step
+    return placements
+
+
+def lock_piece(rows, full_row, piece, x, y):
+    """Rows after locking the piece and clearing full ones, with the cleared count
+
+    Returns None if part of the piece would stay above the board, which the
+    game turns into a game over.
+    """
+    if y < 0 and any(piece.row_masks[:-y]):
+        return None
+    rows = rows[:]
+    shift = x + piece.left
+    for row_idx, bits in enumerate(piece.row_masks):
+        rows[y + row_idx] |= bits << shift
+    lines = rows.count(full_row)
+    if lines:
+        rows = [0] * lines + [bits for bits in rows if bits != full_row]
+    return rows, lines
+
+
+def board_features(rows, width):
+    """(column heights, holes) of a bitboard, in one pass over its rows"""
+    height = len(rows)
+    heights = [0] * width
+    covered = holes = 0
+    for y, row in enumerate(rows):
+        # Columns whose top block is in this row
+        new = row & ~covered
+        while new:
+            bit = new & -new
+            heights[bit.bit_length() - 1] = height - y
+            new ^= bit
+        holes += bin(covered & ~row).count('1')
+        covered |= row
+    return heights, holes
+
+
+# (column, top row, bottom row) of each occupied column of every orientation
+column_spans = {
+    piece.matrix: tuple((col, min(r for c, r in piece.cells if c == col), low)
+                        for col, low in enumerate(piece.contour) if low >= 0)
+    for orientations in rotation_table for piece in orientations
+}
+
+
+def placed_features(features, height, piece, x, y):
+    """board_features() after locking a piece that clears no rows
+
+    Only the piece's columns change: each may rise to the piece's top cell
+    and gains a hole for every empty cell between its old top and the
+    piece's lowest cell in it.
+    """
+    heights, holes = features
+    heights = heights[:]
+    for col, top, bottom in column_spans[piece.matrix]:
+        column = x + col
+        holes += height - 1 - (y + bottom) - heights[column]
+        heights[column] = height - (y + top)
+    return heights, holes
+
+
+class Bot:
+    """Chooses placements for a GameState
+
+    Boards reached without clearing rows are scored incrementally from their
+    parent. Full evaluations are cached by row contents, the least recently
+    used going once the cache holds cache_size entries or cache_bytes of
+    them. With workers > 1 the first-level placements are searched in a
+    process pool, which pays off for depth 3 and beyond.
+
+    With keys_per_row set, the bot only picks placements it can line up in
+    time: rotations and slides are limited to keys_per_row for each row
+    the piece falls before it lands, as when every key has to be pressed
+    while the piece drops one row per gravity tick.
+    """
+
+    def __init__(self, depth=2, weights=default_weights, workers=0, cache_size=200000,
+                 cache_bytes=64 << 20, keys_per_row=None):
+        self.depth = depth
+        self.weights = weights
+        self.workers = workers
+        self.cache_size = cache_size
+        self.cache_bytes = cache_bytes
+        self.cache = TranspositionCache(cache_size, cache_bytes)
+        self.keys_per_row = keys_per_row
+        self.out_of_reach = 0  # Placements skipped for want of time to reach them
+        self.evaluated = 0  # Boards scored
+        self.pool = None
+
+    def features(self, rows, width):
+        """board_features() through the cache of evaluated boards"""
+        key = tuple(rows)
+        features = self.cache.get(key)
+        if features is None:
+            features = board_features(rows, width)
+            self.cache.put(key, features, features_entry_size(width, len(rows)))
+        return features
+
+    def child(self, rows, features, piece, x, y, width, height):
+        """(rows, features, lines) after locking a piece, or None if it tops out"""
+        locked = lock_piece(rows, (1 << width) - 1, piece, x, y)
+        if locked is None:
+            return None
+        rows, lines = locked
+        if lines:
+            # Cleared rows shift every column, so score the new board from scratch
+            return rows, self.features(rows, width), lines
+        return rows, placed_features(features, height, piece, x, y), 0
+
+    def value(self, features, lines):
+        """Heuristic value of a board's features plus the lines cleared to reach it"""
+        self.evaluated += 1
+        heights, holes = features
+        bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+        w_height, w_lines, w_holes, w_bumpiness = self.weights
+        return (w_height * sum(heights) + w_lines * lines +
+                w_holes * holes + w_bumpiness * bumpiness)
+
+    def best_value(self, rows, features, width, height, queue, depth, lines=0):
+        """Best value after placing depth more pieces, taken from queue while it lasts"""
+        if depth == 0:
+            return self.value(features, lines)
+        if not queue:
+            # Unknown piece: average the best outcome over every shape
+            return sum(self.best_value(rows, features, width, height, (piece_id,), depth, lines)
+                       for piece_id in range(len(rotation_table))) / len(rotation_table)
+        piece_id = queue[0]
+        x, y = spawn_position(width, rotation_table[piece_id][0])
+        best = lost
+        for _, px, py, piece in reachable_placements(rows, width, height, piece_id, 0, x, y):
+            child = self.child(rows, features, piece, px, py, width, height)
+            if child is not None:
+                child_rows, child_features, child_lines = child
+                best = max(best, self.best_value(child_rows, child_features, width, height,
+                                                 queue[1:], depth - 1, lines + child_lines))
+        return best
+
+    def choose(self, game):
+        """Best (rotations, x) for the falling piece, or None if every placement loses"""
+        width, height = game.width, game.height
+        features = self.features(game.rows, width)
+        candidates = []
+        for turns, x, y, piece in reachable_placements(game.rows, width, height, game.piece_id,
+                                                       game.rotation, game.piece_x, game.piece_y):
+            # Keys go in before each gravity tick, the last one before the tick that locks
+            if (self.keys_per_row is not None and
+                    turns + abs(x - game.piece_x) > self.keys_per_row * (y - game.piece_y + 1)):
+                self.out_of_reach += 1
+                continue
+            child = self.child(game.rows, features, piece, x, y, width, height)
+            if child is not None:
+                candidates.append((turns, x, child))
+        if not candidates:
+            return None
+
+        queue = tuple(game.preview(self.depth - 1))
+        jobs = [(rows, child_features, width, height, queue, self.depth - 1, lines)
+                for _, _, (rows, child_features, lines) in candidates]
+        if self.workers > 1 and self.depth > 2:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                initargs=(self.weights, self.cache_size, self.cache_bytes))
+            values = list(self.pool.map(_worker_value, jobs))
+        else:
+            values = [self.best_value(*job) for job in jobs]
+        best = max(range(len(candidates)), key=values.__getitem__)
+        turns, x, _ = candidates[best]
+        return turns, x
+
+    def plan(self, game):
+        """Rotate and slide actions that line the falling piece up over its best spot"""
+        choice = self.choose(game)
+        if choice is None:
+            return []
+        turns, x = choice
+        slide = Action.LEFT if x < game.piece_x else Action.RIGHT
+        return [Action.ROTATE] * turns + [slide] * abs(x - game.piece_x)
+
+    def play_piece(self, game):
+        """Plan the falling piece and hard drop it, returning the rows it cleared"""
+        for action in self.plan(game):
+            game.step(action)
+        return game.step(Action.HARD_DROP)
+
+    def close(self):
+        """Shut down the worker pool, if one was started"""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+# Per-process bot used by the worker pool
+worker_bot = None
+
+
+def _init_worker(weights, cache_size, cache_bytes):
+    global worker_bot
+    worker_bot = Bot(weights=weights, cache_size=cache_size, cache_bytes=cache_bytes)
+
+
+def _worker_value(job):
+    return worker_bot.best_value(*job)
@@ -0,0 +1,385 @@
+"""Headless Tetris rules, usable without OpenGL or a display"""
+import random
+from collections import namedtuple
+from enum import Enum
+from itertools import compress
+
+from pieces import generators
+from profiler import instrument
+
+# Tetrimino Shapes
+tetrimino_shapes = [
+    [[1, 1, 1], [0, 1, 0]],  # T
+    [[1, 1, 1, 1]],          # I
+    [[1, 1], [1, 1]],        # O
+    [[1, 1, 0], [0, 1, 1]],  # Z
+    [[0, 1, 1], [1, 1, 0]],  # S
+    [[1, 1, 1], [1, 0, 0]],  # L
+    [[1, 1, 1], [0, 0, 1]]   # J
+]
+
+
+# One orientation of a piece, with everything the rules and renderer need
+Orientation = namedtuple('Orientation', [
+    'matrix',     # Tuple-of-tuples cell matrix, row 0 at the top
+    'cells',      # (col, row) offsets of the occupied cells
+    'width',      # Bounding box size
+    'height',
+    'left',       # Leftmost, rightmost and lowest occupied offsets
+    'right',
+    'bottom',
+    'row_masks',  # Bitmask per matrix row, bit 0 at the leftmost occupied column
+    'contour',    # Lowest occupied row offset per column, -1 if the column is empty
+])
+
+
+def build_orientation(matrix):
+    """Precompute the Orientation record of a piece matrix"""
+    matrix = tuple(tuple(row) for row in matrix)
+    cells = tuple((c, r) for r, row in enumerate(matrix) for c, cell in enumerate(row) if cell)
+    left = min(c for c, _ in cells)
+    right = max(c for c, _ in cells)
+    bottom = max(r for _, r in cells)
+    row_masks = tuple(sum(1 << (c - left) for c, cell in enumerate(row) if cell)
+                      for row in matrix)
+    contour = tuple(max((r for c2, r in cells if c2 == c), default=-1)
+                    for c in range(len(matrix[0])))
+    return Orientation(matrix, cells, len(matrix[0]), len(matrix),
+                       left, right, bottom, row_masks, contour)
+
+
+def rotate(piece):
+    """Rotate a piece matrix clockwise"""
+    return list(zip(*reversed(piece)))
+
+
+def build_rotation_table(shapes):
+    """The four clockwise orientations of every shape, indexed [piece_id][rotation]"""
+    table = []
+    for shape in shapes:
+        orientations = []
+        for _ in range(4):
+            orientations.append(build_orientation(shape))
+            shape = rotate(shape)
+        table.append(tuple(orientations))
+    return tuple(table)
+
+
+rotation_table = build_rotation_table(tetrimino_shapes)
+
+
+def piece_fits(rows, width, height, piece, x, y):
+    """Check if a piece orientation fits at (x, y) on a bitboard"""
+    # Check horizontal bounds and whether the piece has reached the bottom
+    if x + piece.left < 0 or x + piece.right >= width or y + piece.bottom >= height:
+        return False
+    shift = x + piece.left
+    for row_idx, bits in enumerate(piece.row_masks):
+        board_y = y + row_idx
+        if board_y >= 0 and rows[board_y] & (bits << shift):
+            return False
+    return True
+
+
+def column_tops(rows, width, start=0):
+    """Index of the highest block in each column, len(rows) where a column is empty
+
+    Rows above start must be empty. The scan stops once every column has
+    been seen, so it only visits the stack's upper surface.
+    """
+    height = len(rows)
+    tops = [height] * width
+    full_row = (1 << width) - 1
+    covered = 0
+    for y in range(start, height):
+        new = rows[y] & ~covered
+        while new:
+            bit = new & -new
+            tops[bit.bit_length() - 1] = y
+            new ^= bit
+        covered |= rows[y]
+        if covered == full_row:
+            break
+    return tops
+
+
+def landing_row(rows, tops, width, height, piece, x, y):
+    """Lowest y a fitting piece falls to from (x, y), given the column_tops() of rows
+
+    While the piece is above the highest block of every column it covers,
+    nothing can stop it before those blocks, so the landing row is a max over
+    its bottom contour: O(piece width) instead of a collision check per row.
+    A piece tucked under an overhang falls back to stepping down row by row.
+    """
+    landing = height
+    for col, low in enumerate(piece.contour):
+        if low >= 0:
+            top = tops[x + col]
+            if y + low >= top:
+                while piece_fits(rows, width, height, piece, x, y + 1):
+                    y += 1
+                return y
+            landing = min(landing, top - 1 - low)
+    return landing
+
+
+def spawn_position(width, piece):
+    """Where a piece orientation enters the board"""
+    return width // 2 - piece.width // 2, -1  # Start one row above the board
+
+
+class Action(Enum):
+    LEFT = 0
+    RIGHT = 1
+    ROTATE = 2
+    DOWN = 3    # Soft drop key and gravity tick alike
+    HARD_DROP = 4
+
+
+class GameMode(Enum):
+    EASY = 500    # Update interval in milliseconds (slower)
+    MEDIUM = 300  # Medium speed
+    HARD = 100    # Faster speed
+
+
+class GameState:
+    """Board, pieces and score of a single game
+
+    The board is rows, one bitmask per row (bit x set for column x), so
+    work on it scales with the number of rows rather than cells, and a row
+    is full when its mask equals full_row. top bounds the stack: no row
+    above it holds a block, and tops holds the highest block of each
+    column, which is what hard drops and the ghost piece land against.
+    Locks and clears update tops in place; after rows are set directly it
+    is recounted when next read.
+    occupied_cells() lists the settled blocks for the renderer and grid
+    rebuilds the full cell matrix when one is needed for display.
+
+    Pieces are (piece_id, rotation) indices into rotation_table, dealt by
+    the named policy from pieces.generators.
+    """
+
+    def __init__(self, width=10, height=20, rng=None, seed=None, policy='uniform'):
+        self.width = width
+        self.height = height
+        self.full_row = (1 << width) - 1
+        self.rng = rng if rng is not None else random.Random()
+        self.seed = None
+        self.policy = policy
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Start a new game, reseeding the piece sequence when a seed is given"""
+        if seed is not None:
+            self.seed = seed
+            self.rng = random.Random(seed)
+        self.rows = [0] * self.height
+        self.top = self.height
+        self.cached_tops = [self.height] * self.width  # tops, or None until it is next read
+        self.score = 0
+        self.lines = 0   # Rows cleared this game
+        self.pieces = 0  # Pieces locked this game
+        self.game_over = False
+        self.generator = generators[self.policy](self.rng)
+        self.piece_id = None
+        self.rotation = 0
+        self.piece_x, self.piece_y = 4, 0
+        self.locked_cells = []  # Cells written by the last place_piece()
+        self.last_cleared = 0   # Rows cleared by the last step()
+        self.ticks = 0          # step() calls since the reset
+        self.spawn_piece()
+
+    def snapshot(self):
+        """Copy of everything step() depends on, for restore()"""
+        return (self.generator.snapshot(), self.rows[:],
+                self.score, self.lines, self.pieces, self.game_over, self.piece_id,
+                self.rotation, self.piece_x, self.piece_y, self.ticks)
+
+    def restore(self, snapshot):
+        """Return to a state taken with snapshot()"""
+        (generator, rows, self.score, self.lines, self.pieces, self.game_over,
+         self.piece_id, self.rotation, self.piece_x, self.piece_y, self.ticks) = snapshot
+        self.generator.restore(generator)
+        self.rows = rows[:]
+        self.top = self.stack_top()
+        self.cached_tops = None
+        self.locked_cells = []
+        self.last_cleared = 0
+
+    def step(self, action):
+        """Apply one action and return the number of rows it cleared"""
+        self.locked_cells = []
+        self.last_cleared = 0
+        self.ticks += 1
+        if self.game_over:
+            return 0
+        if action is Action.DOWN:
+            self.move_piece(0, 1)
+        elif action is Action.LEFT:
+            self.move_piece(-1, 0)
+        elif action is Action.RIGHT:
+            self.move_piece(1, 0)
+        elif action is Action.ROTATE:
+            self.rotate_piece()
+        elif action is Action.HARD_DROP:
+            self.hard_drop()
+        return self.last_cleared
+
+    def stack_top(self):
+        """Index of the highest row holding a block, height if the board is empty"""
+        return next(compress(range(self.height), self.rows), self.height)
+
+    @instrument
+    def clear_rows(self, touched=None):
+        """Clear completed rows, update score and return how many were cleared
+
+        Only rows in touched, the ones the landing piece wrote to in
+        increasing order, can have filled up, so only those are compared
+        with full_row. Without touched
+        every row is checked, for boards whose rows were set directly.
+        """
+        rows, full_row = self.rows, self.full_row
+        if touched is None:
+            self.top = self.stack_top()
+            self.cached_tops = None
+            # Find the first full row with list methods, compare only from there on
+            touched = range(rows.index(full_row) if full_row in rows else self.height, self.height)
+        lowest = highest = -1  # Lowest and highest full row
+        for y in touched:
+            if rows[y] == full_row:
+                if highest < 0:
+                    highest = y
+                lowest = y
+        cleared_rows = 0
+        if lowest >= 0:
+            # One pass over the stack, from its top down to the lowest full
+            # row, moves every surviving row to its final place
+            top = self.top
+            survivors = [bits for bits in rows[top:lowest + 1] if bits != full_row]
+            cleared_rows = lowest + 1 - top - len(survivors)
+            rows[top:lowest + 1] = [0] * cleared_rows + survivors
+            self.top = top + cleared_rows
+            tops = self.cached_tops
+            if tops is not None:  # Else recounted when next read
+                for x, column_top in enumerate(tops):
+                    if column_top < highest:
+                        # Every cleared row is below this column's top block
+                        tops[x] = column_top + cleared_rows
+                    elif column_top <= lowest:
+                        # The top block was in the cleared band: blocks only move down,
+                        # so look for the column's new top from its old one
+                        bit = 1 << x
+                        while column_top < self.height and not rows[column_top] & bit:
+                            column_top += 1
+                        tops[x] = column_top
+        
+        if cleared_rows >= 2:
+            self.score += cleared_rows * 10  # Double points for combo
+        else:
+            self.score += cleared_rows * 5
+        self.lines += cleared_rows
+        self.last_cleared = cleared_rows
+        return cleared_rows
+
+    @property
+    def grid(self):
+        """Cell matrix of the settled blocks, built from rows on each access"""
+        return [[bits >> x & 1 for x in range(self.width)] for bits in self.rows]
+
+    def occupied_cells(self):
+        """(x, y) of every settled block, in time linear in rows plus blocks"""
+        cells = []
+        for y, bits in enumerate(self.rows):
+            while bits:
+                low = bits & -bits
+                cells.append((low.bit_length() - 1, y))
+                bits ^= low
+        return cells
+
+    @property
+    def tops(self):
+        """Row of the highest block in each column, height where a column is empty"""
+        if self.cached_tops is None:
+            self.cached_tops = column_tops(self.rows, self.width, self.top)
+        return self.cached_tops
+
+    @property
+    def piece(self):
+        """Orientation of the falling piece"""
+        return rotation_table[self.piece_id][self.rotation]
+
+    @property
+    def next_id(self):
+        """Piece id that spawns after the falling piece"""
+        return self.generator.peek(1)[0]
+
+    @property
+    def next_piece(self):
+        """Spawn orientation of the next piece"""
+        return rotation_table[self.next_id][0]
+
+    def preview(self, count):
+        """Ids of the next count pieces, in the order they will spawn"""
+        return self.generator.peek(count)
+
+    @instrument
+    def spawn_piece(self):
+        """Spawn the generator's next piece at the top of the board"""
+        self.piece_id = self.generator.pop()
+        self.rotation = 0
+        piece = self.piece
+        self.piece_x, self.piece_y = spawn_position(self.width, piece)
+        
+        if not self.can_place_piece(piece, self.piece_x, self.piece_y):
+            self.game_over = True
+
+    @instrument
+    def can_place_piece(self, piece, x, y):
+        """Check if a piece orientation can be placed at given position"""
+        return piece_fits(self.rows, self.width, self.height, piece, x, y)
+
+    def place_piece(self):
+        """Lock the current piece into the grid, then clear rows and spawn"""
+        piece = self.piece
+        first_row, last_row = max(self.piece_y, 0), self.piece_y + piece.height
+        tops = self.tops
+        for col_idx, row_idx in piece.cells:
+            if self.piece_y + row_idx >= 0:
+                x, y = self.piece_x + col_idx, self.piece_y + row_idx
+                self.rows[y] |= 1 << x
+                self.locked_cells.append((x, y))
+                if y < tops[x]:
+                    tops[x] = y
+        self.top = min(self.top, first_row)
+        self.pieces += 1
+        self.clear_rows(range(first_row, last_row))
+        self.spawn_piece()
+
+    def move_piece(self, dx, dy):
+        """Move the current piece, locking it when it can't fall any further"""
+        piece = self.piece
+        if self.can_place_piece(piece, self.piece_x + dx, self.piece_y + dy):
+            self.piece_x += dx
+            self.piece_y += dy
+            return True
+        elif dy > 0:  # Piece has landed
+            # Make sure the piece is placed at the bottom or on top of other pieces
+            if self.piece_y + piece.height <= self.height:
+                self.place_piece()
+        return False
+
+    def landing_row(self):
+        """Row the falling piece would lock on if dropped straight down"""
+        return landing_row(self.rows, self.tops, self.width, self.height,
+                           self.piece, self.piece_x, self.piece_y)
+
+    def hard_drop(self):
+        """Drop the current piece straight to its landing row and lock it there"""
+        self.piece_y = self.landing_row()
+        self.move_piece(0, 1)
+
+    def rotate_piece(self):
+        """Rotate the current piece clockwise if it fits"""
+        rotation = (self.rotation + 1) % 4
+        if self.can_place_piece(rotation_table[self.piece_id][rotation], self.piece_x, self.piece_y):
+            self.rotation = rotation
@@ -0,0 +1,72 @@
+"""Fixed-timestep loop timing, kept separate from GLUT so it can run headless"""
+import time
+from collections import deque
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sequence, 0.0 when it is empty"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class FixedTimestep:
+    """Turns a monotonic clock into fixed simulation ticks, whatever the frame rate
+
+    Each frame adds the elapsed real time to an accumulator and runs one
+    tick per whole tick_interval in it, so gravity keeps its rate while
+    rendering and effects run at the frame rate. Frame times and how late
+    each tick ran (its jitter) are kept for reporting.
+    """
+
+    def __init__(self, tick_interval, max_ticks_per_frame=5, clock=time.perf_counter,
+                 history=600):
+        self.tick_interval = tick_interval
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.clock = clock
+        self.frame_times = deque(maxlen=history)
+        self.tick_jitter = deque(maxlen=history)
+        self.reset()
+
+    def reset(self):
+        """Restart timing from now, with no ticks owed"""
+        self.last_frame = self.clock()
+        self.accumulator = 0.0
+
+    def begin_frame(self, running=True):
+        """Return (seconds since the last frame, simulation ticks due now)
+
+        While not running (paused or game over) no time is accumulated, so
+        the game doesn't jump ahead when it resumes.
+        """
+        now = self.clock()
+        elapsed = now - self.last_frame
+        self.last_frame = now
+        self.frame_times.append(elapsed)
+        if not running:
+            self.accumulator = 0.0
+            return elapsed, 0
+        
+        self.accumulator += elapsed
+        ticks = 0
+        while self.accumulator >= self.tick_interval and ticks < self.max_ticks_per_frame:
+            self.accumulator -= self.tick_interval
+            self.tick_jitter.append(self.accumulator)  # How long after it was due
+            ticks += 1
+        if ticks == self.max_ticks_per_frame:
+            # Too far behind (a stall or breakpoint), drop the backlog
+            self.accumulator = min(self.accumulator, self.tick_interval)
+        return elapsed, ticks
+
+    def summary(self):
+        """Measured frame times and tick jitter, in milliseconds"""
+        frames, jitter = self.frame_times, self.tick_jitter
+        mean_frame = sum(frames) / len(frames) if frames else 0.0
+        return (f"frames: {len(frames)}, mean {mean_frame * 1e3:.1f} ms "
+                f"({1 / mean_frame if mean_frame else 0:.0f} FPS), "
+                f"p95 {percentile(frames, 0.95) * 1e3:.1f} ms | "
+                f"ticks: {len(jitter)} at {self.tick_interval * 1e3:.0f} ms, jitter "
+                f"p50 {percentile(jitter, 0.5) * 1e3:.1f} ms, "
+                f"p95 {percentile(jitter, 0.95) * 1e3:.1f} ms, "
+                f"max {max(jitter, default=0.0) * 1e3:.1f} ms")
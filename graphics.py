@@ -0,0 +1,31 @@
+"""Deferred PyOpenGL loading for the windowed game
+
+OpenGL.GL, GLUT and GLU make up most of the game's import time, so the
+game script only imports view.py, which draws with them, when main() is
+about to open a window, or when headless.py sets up its context. Game logic, leaderboards, replays
+and tournaments never import them.
+
+PyOpenGL checks glGetError after every GL call and keeps logging hooks
+around each one. Set TETRIS_GL_CHECKS=0 for release runs to turn both
+off. The choice has to be made before OpenGL.GL is first imported, which
+configure() takes care of.
+"""
+import os
+import sys
+
+checks = os.environ.get('TETRIS_GL_CHECKS', '1') not in ('', '0')
+
+
+def configure():
+    """Apply the error checking choice; call before the first OpenGL.GL import"""
+    import OpenGL
+    OpenGL.ERROR_CHECKING = checks
+    OpenGL.ERROR_LOGGING = checks
+    flags = sys.modules.get('OpenGL._configflags')
+    if flags is not None:
+        # PyOpenGL copies the flags here when a platform is first imported,
+        # which headless.py has done already with EGL, and reads the copy as
+        # each GL function is created
+        flags.ERROR_CHECKING = checks
+        flags.ERROR_LOGGING = checks
+
@@ -0,0 +1,338 @@
+"""Offscreen rendering without GLUT windows, for benchmarks and visual regression
+
+An EGL pbuffer stands in for the GLUT windows: the view's display() and
+display_menu() draw into it unchanged and the result is read back into a
+NumPy image. GLUT itself refuses to run without a window, so the loaded
+view module gets a few replacements: buffer swaps, redisplays, timers
+and window changes do nothing, and bitmap text is drawn from freeglut's
+own font tables with the same glBitmap call glutBitmapCharacter makes.
+Fonts missing from the GLUT library are skipped.
+
+Golden images of scripted scenes live in golden/ as PNG files.
+
+Usage: python headless.py check|update|bench
+"""
+import os
+
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')  # Must be set before OpenGL is imported
+if not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+    os.environ.setdefault('EGL_PLATFORM', 'surfaceless')  # Mesa: no window system to talk to
+
+import ctypes
+import importlib.util
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from OpenGL import EGL, platform
+
+import graphics
+
+# After EGL, whose error module breaks with checking off, and before GL,
+# whose functions take the setting when they are created
+graphics.configure()
+from OpenGL.GL import *
+
+from bot import Bot
+from engine import Action
+from renderer import create_renderer, renderers
+
+game_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Tetris Game.py')
+golden_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+menu_size = (400, 500)
+
+# GLUT font handle symbols and the freeglut tables behind them
+font_tables = {
+    'glutBitmap9By15': 'fgFontFixed9x15',
+    'glutBitmap8By13': 'fgFontFixed8x13',
+    'glutBitmapTimesRoman10': 'fgFontTimesRoman10',
+    'glutBitmapTimesRoman24': 'fgFontTimesRoman24',
+    'glutBitmapHelvetica10': 'fgFontHelvetica10',
+    'glutBitmapHelvetica12': 'fgFontHelvetica12',
+    'glutBitmapHelvetica18': 'fgFontHelvetica18',
+}
+
+
+class BitmapFont(ctypes.Structure):
+    """freeglut's SFG_Font"""
+    _fields_ = [('name', ctypes.c_char_p), ('quantity', ctypes.c_int), ('height', ctypes.c_int),
+                ('characters', ctypes.POINTER(ctypes.POINTER(ctypes.c_ubyte))),
+                ('xorig', ctypes.c_float), ('yorig', ctypes.c_float)]
+
+
+def load_fonts():
+    """Map each GLUT font handle's address to its freeglut table"""
+    fonts = {}
+    library = platform.PLATFORM.GLUT
+    for handle, table in font_tables.items():
+        try:
+            address = ctypes.addressof(ctypes.c_void_p.in_dll(library, handle))
+            fonts[address] = BitmapFont.in_dll(library, table)
+        except (ValueError, TypeError):
+            continue
+    return fonts
+
+
+fonts = load_fonts()
+
+
+def bitmap_character(font, character):
+    """glutBitmapCharacter without GLUT: one glBitmap from the font's table"""
+    table = fonts.get(font.value if isinstance(font, ctypes.c_void_p) else font)
+    if table is None or not 1 <= character < table.quantity:
+        return
+    face = table.characters[character]
+    width = face[0]
+    bitmap = ctypes.string_at(ctypes.addressof(face.contents) + 1, (width + 7) // 8 * table.height)
+    glPushClientAttrib(GL_CLIENT_PIXEL_STORE_BIT)
+    glPixelStorei(GL_UNPACK_SWAP_BYTES, GL_FALSE)
+    glPixelStorei(GL_UNPACK_LSB_FIRST, GL_FALSE)
+    glPixelStorei(GL_UNPACK_ROW_LENGTH, 0)
+    glPixelStorei(GL_UNPACK_SKIP_ROWS, 0)
+    glPixelStorei(GL_UNPACK_SKIP_PIXELS, 0)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    glBitmap(width, table.height, table.xorig, table.yorig, float(width), 0.0, bitmap)
+    glPopClientAttrib()
+
+
+def create_context(width, height):
+    """Make an EGL pbuffer of the given size the current OpenGL context"""
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    major, minor = EGL.EGLint(), EGL.EGLint()
+    if not EGL.eglInitialize(display, ctypes.byref(major), ctypes.byref(minor)):
+        raise RuntimeError("no EGL display available")
+    attributes = (EGL.EGLint * 11)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                                   EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                                   EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8,
+                                   EGL.EGL_BLUE_SIZE, 8, EGL.EGL_NONE)
+    config, count = EGL.EGLConfig(), EGL.EGLint()
+    EGL.eglChooseConfig(display, attributes, ctypes.byref(config), 1, ctypes.byref(count))
+    if not count.value:
+        raise RuntimeError("no EGL config with desktop OpenGL pbuffers")
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    size = (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE)
+    surface = EGL.eglCreatePbufferSurface(display, config, size)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    if not EGL.eglMakeCurrent(display, surface, surface, context):
+        raise RuntimeError("could not make the EGL context current")
+
+
+def load_game():
+    """Import the game script as a module that draws into the current context"""
+    spec = importlib.util.spec_from_file_location('tetris_game', game_path)
+    game = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = game  # load_graphics() hands the module to the view by name
+    spec.loader.exec_module(game)
+    game.load_graphics()
+    game.view.glutBitmapCharacter = bitmap_character
+    for name in ('glutSwapBuffers', 'glutPostRedisplay', 'glutTimerFunc', 'glutReshapeWindow',
+                 'glutSetWindowTitle'):
+        setattr(game.view, name, lambda *args: None)
+    return game
+
+
+def start_game(game, seed, highest_score=500):
+    """Set up the game module as create_window() and start_game() would, with a seeded game"""
+    glViewport(0, 0, game.window_width, game.window_height)
+    game.view.init()
+    game.view.create_board_layer()
+    game.restart_game()
+    game.game.reset(seed=seed)
+    game.highest_score = highest_score
+    game.combo_effect_timer = game.celebration_timer = 0
+
+
+def read_pixels(width, height):
+    """(height, width, 3) uint8 image of the framebuffer, top row first"""
+    glFinish()
+    data = glReadPixels(0, 0, width, height, GL_RGB, GL_UNSIGNED_BYTE)
+    return np.frombuffer(data, np.uint8).reshape(height, width, 3)[::-1].copy()
+
+
+def write_png(path, image):
+    """Save an (H, W, 3) uint8 image as an RGB PNG"""
+    height, width, _ = image.shape
+    raw = b''.join(b'\0' + row.tobytes() for row in image)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    with open(path, 'wb') as file:
+        file.write(b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+                   + chunk(b'IDAT', zlib.compress(raw, 9)) + chunk(b'IEND', b''))
+
+
+def read_png(path):
+    """Load an RGB PNG written by write_png()"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    pos, idat = 8, b''
+    while pos < len(data):
+        length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if kind == b'IHDR':
+            width, height = struct.unpack('>II', body[:8])
+        elif kind == b'IDAT':
+            idat += body
+        pos += 12 + length
+    rows = np.frombuffer(zlib.decompress(idat), np.uint8).reshape(height, width * 3 + 1)
+    return rows[:, 1:].reshape(height, width, 3).copy()
+
+
+def play_pieces(game, pieces):
+    """Let the bot place a number of pieces through the game's own apply_action()"""
+    bot = Bot(depth=1)
+    target = game.game.pieces + pieces
+    while game.game.pieces < target and not game.game.game_over:
+        for action in bot.plan(game.game):
+            game.apply_action(action)
+        placed = game.game.pieces
+        while game.game.pieces == placed and not game.game.game_over:
+            game.apply_action(Action.DOWN)
+
+
+def scene_menu(game):
+    game.view.init()  # Same clear colour, point size and renderer as create_window()
+    glViewport(0, 0, *menu_size)
+    game.view.display_menu()
+    glViewport(0, 0, game.window_width, game.window_height)
+    return menu_size
+
+
+def scene_new_game(game):
+    start_game(game, seed=423)
+    game.view.display()
+
+
+def scene_midgame(game):
+    start_game(game, seed=423)
+    play_pieces(game, 40)
+    game.view.display()
+
+
+def scene_paused(game):
+    start_game(game, seed=7)
+    play_pieces(game, 15)
+    game.paused = True
+    game.view.display()
+
+
+def scene_combo(game):
+    start_game(game, seed=423)
+    play_pieces(game, 40)
+    game.combo_effect_timer = game.combo_effect_duration / 2
+    game.view.display()
+
+
+def scene_game_over(game):
+    start_game(game, seed=423)
+    play_pieces(game, 25)
+    game.game.game_over = True
+    game.view.display()
+
+
+scenes = {
+    'menu': scene_menu,
+    'new_game': scene_new_game,
+    'midgame': scene_midgame,
+    'paused': scene_paused,
+    'combo': scene_combo,
+    'game_over': scene_game_over,
+}
+
+
+def render_scenes(game):
+    """Image of every scripted scene, by name"""
+    images = {}
+    for name, scene in scenes.items():
+        game.view.text_lists.clear()
+        size = scene(game) or (game.window_width, game.window_height)
+        images[name] = read_pixels(*size)
+    return images
+
+
+def check(game, tolerance=0):
+    """Compare every scene with its golden image, saving a diff image for failures"""
+    failed = 0
+    for name, image in render_scenes(game).items():
+        path = os.path.join(golden_dir, f"{name}.png")
+        if not os.path.exists(path):
+            print(f"{name}: no golden image, run: python headless.py update")
+            failed += 1
+            continue
+        golden = read_png(path)
+        if golden.shape != image.shape:
+            print(f"{name}: size {image.shape[1]}x{image.shape[0]}, golden {golden.shape[1]}x{golden.shape[0]}")
+            failed += 1
+            continue
+        changed = (golden != image).any(axis=2)
+        if changed.sum() > tolerance:
+            diff = image.copy()
+            diff[changed] = (255, 0, 255)
+            write_png(f"{name}.diff.png", diff)
+            print(f"{name}: {changed.sum()} pixels differ, see {name}.diff.png")
+            failed += 1
+        else:
+            print(f"{name}: ok")
+    return failed
+
+
+def update(game):
+    """Rewrite the golden images from the current rendering"""
+    os.makedirs(golden_dir, exist_ok=True)
+    for name, image in render_scenes(game).items():
+        write_png(os.path.join(golden_dir, f"{name}.png"), image)
+        print(f"wrote golden/{name}.png")
+
+
+def benchmark(game, pieces=100):
+    """Frames/s of display() over a bot game, per renderer, with and without the layer
+
+    One frame is drawn after every move and gravity step, and only
+    display() plus glFinish() is timed.
+    """
+    results = []
+    for name in renderers:
+        for layered in (True, False):
+            start_game(game, seed=1)
+            game.view.renderer = create_renderer(name)
+            if not layered:
+                game.view.layer_fbo = None
+            bot = Bot(depth=1)
+            frames = 0
+            elapsed = 0.0
+            while game.game.pieces < pieces and not game.game.game_over:
+                placed = game.game.pieces
+                actions = bot.plan(game.game)
+                while game.game.pieces == placed and not game.game.game_over:
+                    game.apply_action(actions.pop(0) if actions else Action.DOWN)
+                    start = time.perf_counter()
+                    game.view.display()
+                    glFinish()
+                    elapsed += time.perf_counter() - start
+                    frames += 1
+            results.append((name, layered, frames, elapsed))
+    return results
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in ('check', 'update', 'bench'):
+        sys.exit(__doc__.strip().splitlines()[-1])
+    game = load_game()
+    create_context(game.window_width, game.window_height)
+    if sys.argv[1] == 'check':
+        sys.exit(1 if check(game) else 0)
+    elif sys.argv[1] == 'update':
+        update(game)
+    else:
+        print(f"{glGetString(GL_RENDERER).decode()}")
+        for name, layered, frames, elapsed in benchmark(game):
+            print(f"{name:9} {'layer' if layered else 'full ':5}: {frames / elapsed:7.1f} frames/s "
+                  f"({elapsed / frames * 1e3:.2f} ms/frame)")
+
+
+if __name__ == "__main__":
+    main()
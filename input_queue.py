@@ -0,0 +1,105 @@
+"""Timestamped key input with delayed auto-shift, kept separate from GLUT
+
+GLUT callbacks only record key presses and releases here, with the time
+they arrived. The frame callback drains the queue once per frame and
+applies the actions in order, so a burst of keypresses costs one redraw
+rather than one per key. OS key repeat is switched off; held keys repeat
+on the game's own schedule instead. A repeating key acts once when it is
+pressed, again after das seconds (delayed auto-shift), then every arr
+seconds (auto-repeat rate). Of several held repeating keys only the
+latest one pressed repeats. Like the game loop's gravity catch-up, a
+drain applies at most max_repeats repeats and drops the rest of a
+backlog left by a stall.
+
+Each drained action is timed from its event to the next presented frame,
+which gives the input-to-photon latency up to the buffer swap.
+"""
+import time
+from collections import deque
+
+from engine import Action
+from game_loop import percentile
+
+
+class InputQueue:
+    """Key events waiting for the next frame, plus the keys being held"""
+
+    def __init__(self, das=0.167, arr=0.033, repeating=(Action.LEFT, Action.RIGHT, Action.DOWN),
+                 clock=time.perf_counter, history=600, max_repeats=5):
+        self.das = das
+        self.arr = arr
+        self.max_repeats = max_repeats
+        self.repeating = frozenset(repeating)
+        self.clock = clock
+        self.latencies = deque(maxlen=history)
+        self.events = deque()  # (time, action) of presses not yet drained
+        self.held = {}         # key -> action, in the order the keys were pressed
+        self.repeat_key = None
+        self.next_repeat = 0.0
+        self.unpresented = []  # Event times of actions applied since the last frame
+
+    def press(self, key, action):
+        """Queue a key press; OS repeats of a key already held are ignored"""
+        if key in self.held:
+            return
+        now = self.clock()
+        self.held[key] = action
+        self.events.append((now, action))
+        if action in self.repeating:
+            self.repeat_key = key
+            self.next_repeat = now + self.das
+
+    def release(self, key):
+        """Stop a held key, handing repeating back to the latest other one still held"""
+        if self.held.pop(key, None) is None or key != self.repeat_key:
+            return
+        self.repeat_key = next((other for other in reversed(self.held)
+                                if self.held[other] in self.repeating), None)
+        self.next_repeat = self.clock() + self.das
+
+    def drain(self):
+        """Actions due since the last drain, oldest first: queued presses, then repeats"""
+        now = self.clock()
+        due = list(self.events)
+        self.events.clear()
+        if self.repeat_key is not None:
+            action = self.held[self.repeat_key]
+            repeats = 0
+            while self.next_repeat <= now and repeats < self.max_repeats:
+                due.append((self.next_repeat, action))
+                self.next_repeat += self.arr
+                repeats += 1
+            if self.next_repeat <= now:
+                # Too far behind (a stall or breakpoint), drop the backlog
+                self.next_repeat = now + self.arr
+        self.unpresented.extend(event_time for event_time, _ in due)
+        return [action for _, action in due]
+
+    def discard(self):
+        """Drop queued presses, and restart the repeat delay (while paused)"""
+        self.events.clear()
+        self.next_repeat = self.clock() + self.das
+
+    def presented(self):
+        """Record latencies of the drained actions; call right after the buffer swap"""
+        if self.unpresented:
+            now = self.clock()
+            self.latencies.extend(now - event_time for event_time in self.unpresented)
+            self.unpresented.clear()
+
+    def reset(self):
+        """Forget held keys, pending events and latencies, e.g. when a new game starts"""
+        self.events.clear()
+        self.held.clear()
+        self.repeat_key = None
+        self.unpresented.clear()
+        self.latencies.clear()
+
+    def summary(self):
+        """Measured input-to-photon latency, in milliseconds"""
+        latencies = self.latencies
+        return (f"input: {len(latencies)} actions, latency "
+                f"p50 {percentile(latencies, 0.5) * 1e3:.1f} ms, "
+                f"p95 {percentile(latencies, 0.95) * 1e3:.1f} ms, "
+                f"p99 {percentile(latencies, 0.99) * 1e3:.1f} ms, "
+                f"max {max(latencies, default=0.0) * 1e3:.1f} ms")
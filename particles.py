@@ -0,0 +1,79 @@
+"""Preallocated NumPy particle storage for the game's effects"""
+import numpy as np
+
+
+def circle_points(count):
+    """(count, 2) float32 unit circle, for effects that only scale and move it"""
+    angles = np.radians(np.arange(count) * (360.0 / count))
+    return np.column_stack((np.cos(angles), np.sin(angles))).astype(np.float32)
+
+
+class ParticleSystem:
+    """Struct-of-arrays particles, updated and drawn in bulk
+
+    Live particles are always the first count rows of each array, so the
+    slices returned by vertices() and colors() can go straight to
+    glVertexPointer/glColorPointer. Emitting past the budget drops the
+    extra particles rather than growing the arrays.
+    """
+
+    def __init__(self, budget=2000, seed=None):
+        self.budget = budget
+        self.rng = np.random.default_rng(seed)
+        self.position = np.zeros((budget, 2), dtype=np.float32)
+        self.velocity = np.zeros((budget, 2), dtype=np.float32)
+        self.color = np.zeros((budget, 3), dtype=np.float32)
+        self.life = np.zeros(budget, dtype=np.float32)  # Seconds left
+        self.count = 0
+
+    def clear(self):
+        """Remove every particle"""
+        self.count = 0
+
+    def emit(self, count, center, radius=(0.0, 0.0), speed=(0.0, 0.0),
+             lifetime=(1.0, 1.0), color=((1.0, 1.0, 1.0), (1.0, 1.0, 1.0))):
+        """Spawn up to count particles in a ring around center, moving outwards
+
+        radius, speed and lifetime are (low, high) ranges, and color is a
+        (low RGB, high RGB) range, all sampled uniformly per particle.
+        """
+        count = min(count, self.budget - self.count)
+        if count <= 0:
+            return 0
+        rng = self.rng
+        new = slice(self.count, self.count + count)
+        angle = rng.uniform(0.0, 2 * np.pi, count)
+        direction = np.column_stack((np.cos(angle), np.sin(angle)))
+        self.position[new] = center + direction * rng.uniform(*radius, count)[:, None]
+        self.velocity[new] = direction * rng.uniform(*speed, count)[:, None]
+        self.color[new] = rng.uniform(color[0], color[1], (count, 3))
+        self.life[new] = rng.uniform(*lifetime, count)
+        self.count += count
+        return count
+
+    def emit_for(self, dt, rate, center, **ranges):
+        """Emit rate particles per second over dt seconds, Poisson-distributed"""
+        return self.emit(int(self.rng.poisson(rate * dt)), center, **ranges)
+
+    def update(self, dt):
+        """Move every particle by dt seconds and drop the expired ones"""
+        n = self.count
+        if not n:
+            return
+        self.position[:n] += self.velocity[:n] * dt
+        self.life[:n] -= dt
+        alive = self.life[:n] > 0
+        kept = int(np.count_nonzero(alive))
+        if kept < n:
+            # Compact the survivors to the front, keeping their order
+            for array in (self.position, self.velocity, self.color, self.life):
+                array[:kept] = array[:n][alive]
+            self.count = kept
+
+    def vertices(self):
+        """(count, 2) float32 positions of the live particles"""
+        return self.position[:self.count]
+
+    def colors(self):
+        """(count, 3) float32 colours of the live particles"""
+        return self.color[:self.count]
@@ -0,0 +1,156 @@
+"""Piece generators: the sequence of pieces a game deals
+
+Every policy draws from the game's own seeded random.Random, so a seed
+fixes the whole sequence, and writes piece ids a block at a time into a
+preallocated ring buffer. Spawning a piece pops from the buffer and the
+preview queue peeks into it, so neither calls the random number
+generator itself.
+
+- uniform: each piece independent and equally likely, the original
+  behaviour. Same seed, same pieces as before generators existed.
+- bag: the seven pieces in a shuffled bag, dealt out before the next bag
+  is shuffled, so a piece never waits more than 12 turns.
+- history: remembers the last four pieces and redraws up to rolls times
+  while the draw is among them, which makes repeats rare without fixing
+  the order.
+"""
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+class PieceGenerator(ABC):
+    """Seedable stream of piece ids, generated in blocks into a ring buffer
+
+    Subclasses implement generate(), which draws the next count ids.
+    """
+
+    name = None
+
+    def __init__(self, rng, kinds=7, block_size=64):
+        self.rng = rng
+        self.kinds = kinds
+        self.block_size = block_size
+        self.buffer = [0] * (2 * block_size)  # Room for a full block behind the longest peek
+        self.head = 0  # Index of the next piece in buffer
+        self.size = 0  # Pieces buffered from head on
+
+    @abstractmethod
+    def generate(self, count):
+        """The next count piece ids, as a list"""
+
+    def refill(self):
+        """Append a block of new pieces after the buffered ones"""
+        if self.size + self.block_size > len(self.buffer):
+            # A long peek: unwrap the buffered pieces into a buffer twice the size
+            buffered = self.peek(self.size)
+            self.buffer = buffered + [0] * (2 * len(self.buffer) - len(buffered))
+            self.head = 0
+        buffer, capacity = self.buffer, len(self.buffer)
+        position = self.head + self.size
+        for piece_id in self.generate(self.block_size):
+            buffer[position % capacity] = piece_id
+            position += 1
+        self.size += self.block_size
+
+    def pop(self):
+        """Deal the next piece id"""
+        if not self.size:
+            self.refill()
+        piece_id = self.buffer[self.head]
+        self.head = (self.head + 1) % len(self.buffer)
+        self.size -= 1
+        return piece_id
+
+    def peek(self, count):
+        """The next count piece ids, without dealing them"""
+        while count > self.size:
+            self.refill()
+        buffer, capacity, head = self.buffer, len(self.buffer), self.head
+        return [buffer[(head + index) % capacity] for index in range(count)]
+
+    def state(self):
+        """Policy state beyond the random generator, for snapshot()"""
+        return None
+
+    def set_state(self, state):
+        pass
+
+    def snapshot(self):
+        """Copy of the generator, for restore()"""
+        return (self.rng.getstate(), self.peek(self.size) if self.size else [], self.state())
+
+    def restore(self, snapshot):
+        """Return to a state taken with snapshot()"""
+        rng_state, buffered, state = snapshot
+        self.rng.setstate(rng_state)
+        self.buffer[:len(buffered)] = buffered
+        self.head, self.size = 0, len(buffered)
+        self.set_state(state)
+
+
+class UniformGenerator(PieceGenerator):
+    """Independent, equally likely pieces"""
+
+    name = 'uniform'
+
+    def generate(self, count):
+        randrange, kinds = self.rng.randrange, self.kinds
+        return [randrange(kinds) for _ in range(count)]
+
+
+class BagGenerator(PieceGenerator):
+    """Shuffled bags holding one of each piece"""
+
+    name = 'bag'
+
+    def __init__(self, rng, kinds=7, block_size=64):
+        super().__init__(rng, kinds, block_size)
+        self.bag = []  # Rest of the current bag, dealt from the end
+
+    def generate(self, count):
+        pieces = []
+        for _ in range(count):
+            if not self.bag:
+                self.bag = list(range(self.kinds))
+                self.rng.shuffle(self.bag)
+            pieces.append(self.bag.pop())
+        return pieces
+
+    def state(self):
+        return self.bag[:]
+
+    def set_state(self, state):
+        self.bag = state[:]
+
+
+class HistoryGenerator(PieceGenerator):
+    """Redraws pieces found in the recent history, up to rolls times"""
+
+    name = 'history'
+    initial_history = (3, 4, 3, 4)  # Z, S, Z, S, so the first pieces are rarely those
+
+    def __init__(self, rng, kinds=7, block_size=64, rolls=4):
+        super().__init__(rng, kinds, block_size)
+        self.rolls = rolls
+        self.history = deque(self.initial_history, maxlen=len(self.initial_history))
+
+    def generate(self, count):
+        randrange, kinds, history = self.rng.randrange, self.kinds, self.history
+        pieces = []
+        for _ in range(count):
+            for _ in range(self.rolls):
+                piece_id = randrange(kinds)
+                if piece_id not in history:
+                    break
+            history.append(piece_id)
+            pieces.append(piece_id)
+        return pieces
+
+    def state(self):
+        return tuple(self.history)
+
+    def set_state(self, state):
+        self.history = deque(state, maxlen=len(self.initial_history))
+
+
+generators = {generator.name: generator for generator in (UniformGenerator, BagGenerator, HistoryGenerator)}
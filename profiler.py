@@ -0,0 +1,107 @@
+"""Opt-in timing of the game's hot paths
+
+Set TETRIS_PROFILE=1 to enable. When it is unset, instrument() hands back
+the function it was given, so the hooks cost nothing in normal runs.
+TETRIS_PROFILE_OUT names the file the stats are written to on exit
+(profile.json by default, CSV when the name ends in .csv).
+"""
+import atexit
+import csv
+import json
+import os
+import time
+from collections import deque
+from functools import wraps
+
+from game_loop import percentile
+
+enabled = os.environ.get('TETRIS_PROFILE', '') not in ('', '0')
+
+
+class Profiler:
+    """Rolling per-function timings plus GL calls and vertices per frame"""
+
+    def __init__(self, history=600):
+        self.history = history
+        self.samples = {}  # Name -> deque of durations in nanoseconds
+        self.gl_calls = 0
+        self.vertices = 0
+        self.frame_gl_calls = deque(maxlen=history)
+        self.frame_vertices = deque(maxlen=history)
+
+    def record(self, name, duration_ns):
+        """Add one timing sample"""
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.history)
+        samples.append(duration_ns)
+
+    def count_gl(self, calls, vertices=0):
+        """Count GL calls and vertices submitted in the current frame"""
+        self.gl_calls += calls
+        self.vertices += vertices
+
+    def end_frame(self):
+        """Close the current frame's GL counters"""
+        self.frame_gl_calls.append(self.gl_calls)
+        self.frame_vertices.append(self.vertices)
+        self.gl_calls = self.vertices = 0
+
+    def stats(self):
+        """{name: {count, p50_ms, p95_ms, p99_ms}} over the rolling window"""
+        result = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            result[name] = {
+                'count': len(ordered),
+                'p50_ms': percentile(ordered, 0.50) / 1e6,
+                'p95_ms': percentile(ordered, 0.95) / 1e6,
+                'p99_ms': percentile(ordered, 0.99) / 1e6,
+            }
+        for name, counts in (('gl_calls_per_frame', self.frame_gl_calls),
+                             ('vertices_per_frame', self.frame_vertices)):
+            result[name] = {
+                'count': len(counts),
+                'p50': percentile(counts, 0.50),
+                'p95': percentile(counts, 0.95),
+                'p99': percentile(counts, 0.99),
+            }
+        return result
+
+    def dump(self, path):
+        """Write stats() as JSON, or as CSV when path ends in .csv"""
+        stats = self.stats()
+        with open(path, 'w', newline='') as file:
+            if path.endswith('.csv'):
+                writer = csv.writer(file)
+                writer.writerow(['name', 'count', 'p50', 'p95', 'p99'])
+                for name, row in stats.items():
+                    values = [row[key] for key in row if key != 'count']
+                    writer.writerow([name, row['count'], *values])
+            else:
+                json.dump(stats, file, indent=2)
+
+
+profiler = Profiler()
+
+
+def instrument(func):
+    """Time every call of func into the profiler, when profiling is enabled"""
+    if not enabled:
+        return func
+    name = func.__name__
+    record = profiler.record
+    clock = time.perf_counter_ns
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(name, clock() - start)
+    return wrapper
+
+
+if enabled:
+    atexit.register(profiler.dump, os.environ.get('TETRIS_PROFILE_OUT', 'profile.json'))
@@ -0,0 +1,78 @@
+"""Midpoint line rasterization shared by the game's draw functions"""
+import numpy as np
+
+
+def midpoint_line(x1, y1, x2, y2):
+    """Midpoint line algorithm implementation"""
+    points = []
+    dx = abs(x2 - x1)
+    dy = abs(y2 - y1)
+    x, y = x1, y1
+    sx = 1 if x2 > x1 else -1
+    sy = 1 if y2 > y1 else -1
+    
+    if dx > dy:
+        err = dx / 2.0
+        while x != x2:
+            points.append((x, y))
+            err -= dy
+            if err < 0:
+                y += sy
+                err += dx
+            x += sx
+    else:
+        err = dy / 2.0
+        while y != y2:
+            points.append((x, y))
+            err -= dx
+            if err < 0:
+                x += sx
+                err += dy
+            y += sy
+    points.append((x, y))
+    return points
+
+
+def rasterize_segments(segments):
+    """Rasterize an (N, 4) array of x1, y1, x2, y2 rows into one (M, 2) float32 array
+
+    The output is point-for-point what concatenating midpoint_line() over the
+    rows gives. Along the major axis step k the minor axis has moved
+    ceil((k * minor - major / 2) / major) times, which is exactly how often
+    the scalar loop's err (starting at major / 2.0) has gone negative.
+    """
+    seg = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+    x1, y1, x2, y2 = seg.T
+    dx = np.abs(x2 - x1)
+    dy = np.abs(y2 - y1)
+    sx = np.where(x2 > x1, 1.0, -1.0)
+    sy = np.where(y2 > y1, 1.0, -1.0)
+    x_major = dx > dy
+    major = np.where(x_major, dx, dy)
+    minor = np.where(x_major, dy, dx)
+
+    # Every segment yields major + 1 points, the last one being its end point
+    counts = major.astype(np.int64) + 1
+    starts = np.cumsum(counts) - counts
+    index = np.repeat(np.arange(len(seg)), counts)
+    k = np.arange(counts.sum(), dtype=np.float64) - starts[index]
+
+    major_i = major[index]
+    safe_major = np.where(major_i > 0, major_i, 1.0)
+    steps = -np.floor_divide(major_i - 2.0 * k * minor[index], 2.0 * safe_major)
+
+    points = np.empty((len(k), 2), dtype=np.float32)
+    along_x = x_major[index]
+    points[:, 0] = x1[index] + sx[index] * np.where(along_x, k, steps)
+    points[:, 1] = y1[index] + sy[index] * np.where(along_x, steps, k)
+    return points
+
+
+def rect_segments(x, y, width, height):
+    """The four edges of a rectangle outline, in the order the game draws them"""
+    return np.array([
+        (x, y, x + width, y),
+        (x, y, x, y + height),
+        (x + width, y, x + width, y + height),
+        (x, y + height, x + width, y + height),
+    ], dtype=np.float64)
@@ -0,0 +1,209 @@
+"""Renderer backends for the game's point-drawn outlines
+
+Everything on screen is drawn as 2px GL_POINTS along midpoint-rasterized
+lines. Two backends submit those points:
+
+- points: client-side vertex arrays, copied from Python memory on every
+  draw call. This is the original path, kept for comparison.
+- instanced: VBOs plus a small GLSL 1.20 program. Cell outlines are
+  rasterized once per size into a static buffer and drawn with one
+  instanced call per colour, offset by a per-cell instance buffer. The
+  settled board keeps its own instance buffer, which is only uploaded
+  again when the board changes.
+
+Both backends draw the same points through the fixed-function matrices,
+point size and current colour, so their output is identical. Set
+TETRIS_RENDERER=points or instanced to choose one; by default the
+instanced backend is used whenever the context supports it.
+"""
+import os
+from functools import lru_cache
+
+from OpenGL.GL import *
+
+from profiler import enabled as profiling, profiler
+from raster import rasterize_segments, rect_segments
+
+vertex_shader = """#version 120
+attribute vec2 corner;  // Outline point relative to the cell origin
+attribute vec2 origin;  // Per-instance cell origin
+void main() {
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(corner + origin, 0.0, 1.0);
+    gl_FrontColor = gl_Color;
+}
+"""
+
+fragment_shader = """#version 120
+void main() {
+    gl_FragColor = gl_Color;
+}
+"""
+
+
+@lru_cache(maxsize=None)
+def outline_shape(width, height):
+    """Packed outline points of a width x height rectangle at the origin"""
+    points = rasterize_segments(rect_segments(0, 0, width, height))
+    points.flags.writeable = False
+    return points
+
+
+class PointRenderer:
+    """Client-side vertex arrays, the original submission path"""
+
+    name = 'points'
+
+    def __init__(self):
+        self.static_origins = None
+        self.static_points = None
+
+    def draw_points(self, vertices, colors=None):
+        """Draw an (N, 2) float32 array as GL_POINTS, with optional (N, 3) colours, in one call"""
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, vertices)
+        if colors is not None:
+            glEnableClientState(GL_COLOR_ARRAY)
+            glColorPointer(3, GL_FLOAT, 0, colors)
+        glDrawArrays(GL_POINTS, 0, len(vertices))
+        if colors is not None:
+            glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if profiling:
+            profiler.count_gl(5 if colors is None else 8, len(vertices))
+
+    def draw_outlines(self, origins, width, height, static=False):
+        """Draw a rectangle outline at each (N, 2) origin in the current colour
+
+        With static=True the expanded points are kept until a different
+        origins array is passed, which is how the settled board is drawn.
+        """
+        if static and origins is self.static_origins:
+            points = self.static_points
+        else:
+            shape = outline_shape(width, height)
+            points = (origins[:, None, :] + shape[None, :, :]).reshape(-1, 2)
+            if static:
+                self.static_origins, self.static_points = origins, points
+        if len(points):
+            self.draw_points(points)
+
+
+class InstancedRenderer:
+    """VBOs and a shader drawing cell outlines as instanced point sets"""
+
+    name = 'instanced'
+
+    def __init__(self):
+        self.program = self.build_program()
+        self.shapes = {}  # (width, height) -> (stream VAO, static VAO, point count)
+        self.points_buffer, self.colors_buffer, self.stream_buffer, self.static_buffer = glGenBuffers(4)
+        self.static_origins = None
+
+    @staticmethod
+    def build_program():
+        program = glCreateProgram()
+        for kind, source in ((GL_VERTEX_SHADER, vertex_shader), (GL_FRAGMENT_SHADER, fragment_shader)):
+            shader = glCreateShader(kind)
+            glShaderSource(shader, source)
+            glCompileShader(shader)
+            if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+                raise RuntimeError(glGetShaderInfoLog(shader).decode())
+            glAttachShader(program, shader)
+            glDeleteShader(shader)
+        # Fixed locations, away from 3, which some drivers alias to gl_Color
+        glBindAttribLocation(program, 0, 'corner')
+        glBindAttribLocation(program, 1, 'origin')
+        glLinkProgram(program)
+        if not glGetProgramiv(program, GL_LINK_STATUS):
+            raise RuntimeError(glGetProgramInfoLog(program).decode())
+        return program
+
+    def shape(self, width, height):
+        """Vertex array objects pairing an outline's points with each instance buffer"""
+        shape = self.shapes.get((width, height))
+        if shape is None:
+            points = outline_shape(width, height)
+            buffer = glGenBuffers(1)
+            self.upload(buffer, points, GL_STATIC_DRAW)
+            arrays = glGenVertexArrays(2)
+            for array, instances in zip(arrays, (self.stream_buffer, self.static_buffer)):
+                glBindVertexArray(array)
+                glBindBuffer(GL_ARRAY_BUFFER, buffer)
+                glEnableVertexAttribArray(0)
+                glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 0, None)
+                glBindBuffer(GL_ARRAY_BUFFER, instances)
+                glEnableVertexAttribArray(1)
+                glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 0, None)
+                glVertexAttribDivisor(1, 1)
+            glBindVertexArray(0)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            shape = self.shapes[width, height] = (*arrays, len(points))
+        return shape
+
+    def upload(self, buffer, data, usage):
+        glBindBuffer(GL_ARRAY_BUFFER, buffer)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, usage)
+
+    def draw_points(self, vertices, colors=None):
+        """Draw an (N, 2) float32 array as GL_POINTS, with optional (N, 3) colours, in one call"""
+        self.upload(self.points_buffer, vertices, GL_STREAM_DRAW)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, None)
+        if colors is not None:
+            self.upload(self.colors_buffer, colors, GL_STREAM_DRAW)
+            glEnableClientState(GL_COLOR_ARRAY)
+            glColorPointer(3, GL_FLOAT, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDrawArrays(GL_POINTS, 0, len(vertices))
+        if colors is not None:
+            glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if profiling:
+            profiler.count_gl(8 if colors is None else 14, len(vertices))
+
+    def draw_outlines(self, origins, width, height, static=False):
+        """Draw a rectangle outline at each (N, 2) origin in the current colour
+
+        With static=True the origins go to the static instance buffer, which
+        is only uploaded again when a different origins array is passed.
+        """
+        if not len(origins):
+            return
+        stream_array, static_array, count = self.shape(width, height)
+        if static:
+            array = static_array
+            if origins is not self.static_origins:
+                self.upload(self.static_buffer, origins, GL_DYNAMIC_DRAW)
+                glBindBuffer(GL_ARRAY_BUFFER, 0)
+                self.static_origins = origins
+        else:
+            array = stream_array
+            self.upload(self.stream_buffer, origins, GL_STREAM_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        glUseProgram(self.program)
+        glBindVertexArray(array)
+        glDrawArraysInstanced(GL_POINTS, 0, count, len(origins))
+        glBindVertexArray(0)
+        glUseProgram(0)
+        if profiling:
+            profiler.count_gl(5 if static else 8, count * len(origins))
+
+
+renderers = {renderer.name: renderer for renderer in (PointRenderer, InstancedRenderer)}
+
+
+def create_renderer(name=None):
+    """Renderer for the current GL context, falling back to points if instancing is missing"""
+    name = name or os.environ.get('TETRIS_RENDERER', InstancedRenderer.name)
+    if name not in renderers:
+        raise ValueError(f"unknown renderer {name!r}, choose from: {', '.join(renderers)}")
+    if name == InstancedRenderer.name:
+        if not (glDrawArraysInstanced and glVertexAttribDivisor and glGenVertexArrays):
+            return PointRenderer()
+        try:
+            return InstancedRenderer()
+        except RuntimeError as error:
+            print(f"Instanced renderer unavailable, using points: {error}")
+            return PointRenderer()
+    return renderers[name]()
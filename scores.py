@@ -0,0 +1,133 @@
+"""Leaderboards of finished games, one SQLite table per GameMode
+
+The database is read once when the store opens and the top scores are
+served from memory after that. Finished games go into the in-memory
+leaderboard at once and are written by a background thread, which
+batches everything queued within flush_delay seconds into a single
+transaction, so the render thread never waits on the disk. SQLite
+commits atomically, so a crash can lose the last unflushed games but
+never leaves a truncated file behind.
+
+Usage: python scores.py [scores.db]
+"""
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from engine import GameMode
+
+Entry = namedtuple('Entry', 'score lines pieces played')
+legacy_path = 'highest_score.txt'  # Single best score kept by older versions
+
+
+def table_name(mode):
+    return f"scores_{mode.name.lower()}"
+
+
+class ScoreStore:
+    """Cached per-mode leaderboards backed by an SQLite file"""
+
+    def __init__(self, path='scores.db', top_n=10, flush_delay=1.0):
+        self.path = path
+        self.top_n = top_n
+        self.flush_delay = flush_delay
+        self.leaderboards = {mode: [] for mode in GameMode}
+        self.pending = queue.Queue()
+        self.writer = None
+        self.load()
+
+    def connect(self):
+        """Open the database, creating any missing tables"""
+        connection = sqlite3.connect(self.path)
+        with connection:
+            for mode in GameMode:
+                table = table_name(mode)
+                connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (score INTEGER NOT NULL, "
+                                   "lines INTEGER NOT NULL, pieces INTEGER NOT NULL, played TEXT NOT NULL)")
+                connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_score ON {table} (score DESC)")
+        return connection
+
+    def load(self):
+        """Read the top_n scores of every mode into memory"""
+        connection = self.connect()
+        try:
+            for mode in GameMode:
+                rows = connection.execute(f"SELECT score, lines, pieces, played FROM {table_name(mode)} "
+                                          "ORDER BY score DESC, played LIMIT ?", (self.top_n,))
+                self.leaderboards[mode] = [Entry(*row) for row in rows]
+        finally:
+            connection.close()
+        if not any(self.leaderboards.values()):
+            self.import_legacy()
+
+    def import_legacy(self):
+        """Carry the old highest_score.txt over as a MEDIUM game, the default mode"""
+        try:
+            with open(legacy_path) as file:
+                score = int(file.read().strip())
+        except (OSError, ValueError):
+            return
+        if score > 0:
+            self.add(GameMode.MEDIUM, score)
+
+    def best(self, mode):
+        """Highest score recorded in a mode, 0 if none"""
+        board = self.leaderboards[mode]
+        return board[0].score if board else 0
+
+    def add(self, mode, score, lines=0, pieces=0):
+        """Record a finished game; it is written to disk in the background"""
+        entry = Entry(score, lines, pieces, datetime.now().isoformat(timespec='seconds'))
+        board = self.leaderboards[mode]
+        board.append(entry)
+        board.sort(key=lambda entry: entry.score, reverse=True)  # Stable, so ties keep the older game first
+        del board[self.top_n:]
+        self.pending.put((mode, entry))
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.write_loop, name='score-writer', daemon=True)
+            self.writer.start()
+
+    def write_loop(self):
+        """Writer thread: insert queued games in one transaction per batch"""
+        connection = self.connect()  # SQLite connections belong to the thread that opens them
+        closing = False
+        while not closing:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.flush_delay
+            while batch[-1] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            closing = batch[-1] is None
+            with connection:
+                for mode, entry in batch[:-1] if closing else batch:
+                    connection.execute(f"INSERT INTO {table_name(mode)} VALUES (?, ?, ?, ?)", entry)
+        connection.close()
+
+    def close(self):
+        """Flush pending games and stop the writer thread"""
+        if self.writer is not None:
+            self.pending.put(None)
+            self.writer.join()
+            self.writer = None
+
+
+def main():
+    store = ScoreStore(sys.argv[1] if len(sys.argv) > 1 else 'scores.db')
+    for mode, board in store.leaderboards.items():
+        print(f"{mode.name}")
+        for rank, entry in enumerate(board, 1):
+            print(f"{rank:3}. {entry.score:6}  {entry.lines:4} lines  {entry.pieces:4} pieces  {entry.played}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Checks of the headless rules against the original list-of-lists game
+
+Run with python -m unittest (or python -m pytest).
+"""
+import random
+import unittest
+
+from bot import Bot
+from engine import Action, GameState, column_tops, tetrimino_shapes
+from replay import Recorder, Replay
+
+
+class ListGame:
+    """The original rules on a list-of-lists grid, kept as the reference
+
+    Piece moves, locking, clearing and scoring are those of the first
+    version of Tetris Game.py. Hard drops step down until the piece locks,
+    as holding the soft drop key would.
+    """
+
+    def __init__(self, width, height, seed):
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)
+        self.grid = [[0] * width for _ in range(height)]
+        self.score = 0
+        self.game_over = False
+        self.next_piece = None
+        self.spawn_piece()
+
+    def spawn_piece(self):
+        if self.next_piece is None:
+            self.next_piece = self.rng.choice(tetrimino_shapes)
+        self.piece = self.next_piece
+        self.next_piece = self.rng.choice(tetrimino_shapes)
+        self.piece_x = self.width // 2 - len(self.piece[0]) // 2
+        self.piece_y = -1
+        if not self.can_place_piece(self.piece, self.piece_x, self.piece_y):
+            self.game_over = True
+
+    def can_place_piece(self, piece, x, y):
+        for row_idx, row in enumerate(piece):
+            for col_idx, cell in enumerate(row):
+                if cell:
+                    new_x, new_y = x + col_idx, y + row_idx
+                    if new_y >= self.height:
+                        return False
+                    if (new_x < 0 or new_x >= self.width or
+                        (new_y >= 0 and self.grid[new_y][new_x])):
+                        return False
+        return True
+
+    def clear_rows(self):
+        cleared_rows = 0
+        y = self.height - 1
+        while y >= 0:
+            if all(self.grid[y]):
+                cleared_rows += 1
+                del self.grid[y]
+                self.grid.insert(0, [0] * self.width)
+            else:
+                y -= 1
+        if cleared_rows >= 2:
+            self.score += cleared_rows * 10
+        else:
+            self.score += cleared_rows * 5
+
+    def place_piece(self):
+        for row_idx, row in enumerate(self.piece):
+            for col_idx, cell in enumerate(row):
+                if cell and self.piece_y + row_idx >= 0:
+                    self.grid[self.piece_y + row_idx][self.piece_x + col_idx] = cell
+        self.clear_rows()
+        self.spawn_piece()
+
+    def move_piece(self, dx, dy):
+        if self.can_place_piece(self.piece, self.piece_x + dx, self.piece_y + dy):
+            self.piece_x += dx
+            self.piece_y += dy
+            return True
+        elif dy > 0:
+            if self.piece_y + len(self.piece) <= self.height:
+                self.place_piece()
+        return False
+
+    def rotate_piece(self):
+        rotated = list(zip(*reversed(self.piece)))
+        if self.can_place_piece(rotated, self.piece_x, self.piece_y):
+            self.piece = rotated
+
+    def step(self, action):
+        if self.game_over:
+            return
+        if action is Action.DOWN:
+            self.move_piece(0, 1)
+        elif action is Action.LEFT:
+            self.move_piece(-1, 0)
+        elif action is Action.RIGHT:
+            self.move_piece(1, 0)
+        elif action is Action.ROTATE:
+            self.rotate_piece()
+        elif action is Action.HARD_DROP:
+            while self.move_piece(0, 1):
+                pass
+
+
+def random_actions(rng):
+    """Endless random key presses, mostly moves, with an occasional hard drop"""
+    actions = [Action.LEFT, Action.RIGHT, Action.ROTATE, Action.DOWN, Action.DOWN, Action.DOWN]
+    while True:
+        yield Action.HARD_DROP if rng.random() < 0.05 else rng.choice(actions)
+
+
+def bot_actions(game, bot):
+    """Key presses of the bot lining up each piece of game, then hard dropping it"""
+    while True:
+        yield from bot.plan(game)
+        yield Action.HARD_DROP
+
+
+def state_of(game):
+    """What a player can see of a GameState, plus its counters"""
+    return (game.rows[:], game.score, game.lines, game.pieces, game.game_over,
+            game.piece_id, game.rotation, game.piece_x, game.piece_y, game.preview(3))
+
+
+def check_invariants(test, game):
+    """Incremental board bookkeeping against a recount from rows"""
+    test.assertLessEqual(game.top, game.stack_top())
+    test.assertFalse(any(game.rows[:game.top]))
+    test.assertEqual(game.tops, column_tops(game.rows, game.width))
+    test.assertEqual(sum(game.grid, []).count(1), len(game.occupied_cells()))
+
+
+class EngineTest(unittest.TestCase):
+
+    def check_against_reference(self, game, actions, steps):
+        """Step game and the reference through actions, comparing after every step"""
+        reference = ListGame(game.width, game.height, game.seed)
+        cleared = 0
+        for _ in range(steps):
+            if game.game_over:
+                break
+            action = next(actions)
+            cleared += game.step(action)
+            reference.step(action)
+            self.assertEqual(game.grid, reference.grid)
+            self.assertEqual(game.score, reference.score)
+            self.assertEqual(game.game_over, reference.game_over)
+            self.assertEqual(game.piece.matrix, tuple(map(tuple, reference.piece)))
+            self.assertEqual((game.piece_x, game.piece_y), (reference.piece_x, reference.piece_y))
+            self.assertEqual(game.next_piece.matrix, tuple(map(tuple, reference.next_piece)))
+            if game.last_cleared or game.locked_cells:
+                check_invariants(self, game)
+        return cleared
+
+    def test_random_play_matches_reference(self):
+        rng = random.Random(423)
+        for width, height in ((10, 20), (4, 6), (17, 9), (10, 100)):
+            for seed in range(40):
+                game = GameState(width, height, seed=seed)
+                self.check_against_reference(game, random_actions(rng), 3000)
+
+    def test_bot_play_matches_reference(self):
+        # The bot clears far more rows than random play, including tetrises
+        game = GameState(seed=24)
+        bot = Bot(depth=1)
+        cleared = self.check_against_reference(game, bot_actions(game, bot), 100000)
+        self.assertGreater(cleared, 800)
+
+    def test_invariants_after_clears(self):
+        rng = random.Random(5)
+        bot = Bot(depth=1)
+        for width, height in ((10, 20), (6, 30), (20, 40)):
+            game = GameState(width, height, seed=rng.getrandbits(32))
+            while not game.game_over and game.pieces < 300:
+                if rng.random() < 0.8:
+                    bot.play_piece(game)
+                else:
+                    game.step(rng.choice(list(Action)))
+                check_invariants(self, game)
+
+    def test_clear_rows_without_touched(self):
+        rng = random.Random(9)
+        for _ in range(200):
+            game = GameState(8, 12, rng=rng)
+            game.rows = [rng.choice((0, game.full_row, rng.getrandbits(8))) for _ in range(12)]
+            grid = [row[:] for row in game.grid]
+            reference = ListGame(8, 12, 0)
+            reference.grid = grid
+            reference.clear_rows()
+            game.clear_rows()
+            self.assertEqual(game.grid, reference.grid)
+            self.assertEqual(game.score, reference.score)
+            check_invariants(self, game)
+
+
+class ReplayTest(unittest.TestCase):
+
+    def record(self, seed, policy, length):
+        """A recording of random play, with the GameState after every tick"""
+        rng = random.Random(seed)
+        ticks = iter(range(10 ** 9))
+        recorder = Recorder(seed, policy=policy, clock=lambda: next(ticks) / 60)
+        game = GameState(seed=seed, policy=policy)
+        states = [state_of(game)]
+        actions = random_actions(rng)
+        while game.ticks < length:
+            action = next(actions)
+            recorder.record(action)
+            game.step(action)
+            states.append(state_of(game))
+        return recorder, states
+
+    def test_seek_round_trips(self):
+        for seed, policy in ((1, 'uniform'), (2, 'bag'), (3, 'history')):
+            recorder, states = self.record(seed, policy, 1500)
+            replay = Replay.from_bytes(recorder.to_bytes(), snapshot_interval=100)
+            self.assertEqual(replay.policy, policy)
+            rng = random.Random(seed)
+            ticks = [rng.randrange(len(states)) for _ in range(40)] + [0, len(states) - 1, 100, 99, 101]
+            for tick in ticks:
+                game = replay.seek(tick)
+                self.assertEqual(game.ticks, tick)
+                self.assertEqual(state_of(game), states[tick])
+                check_invariants(self, game)
+
+    def test_run_matches_recording(self):
+        recorder, states = self.record(7, 'uniform', 2000)
+        replay = Replay.from_bytes(recorder.to_bytes())
+        self.assertEqual(state_of(replay.run()), states[-1])
+        self.assertEqual(len(replay.actions), recorder.count)
+
+
+if __name__ == '__main__':
+    unittest.main()
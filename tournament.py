@@ -0,0 +1,193 @@
+"""Headless self-play tournaments across every CPU core
+
+Plays many seeded games per GameMode with a scripted or heuristic player
+and summarises scores, game lengths and line clears. Each game draws its
+game and player seeds from its own child of one numpy SeedSequence, so
+the streams are independent and a run gives the same results whatever
+worker plays it. Finished games stream back to the parent, which writes
+them to the CSV as they arrive.
+
+A mode sets the gravity interval, and the player gets one key per
+key_interval milliseconds between gravity ticks, so HARD leaves less
+time to line a piece up. The bot only picks placements it can reach in
+time; out_of_reach counts the ones it had to pass over, which is how
+the modes come to differ. The generous EASY and MEDIUM budgets rarely
+rule anything out.
+
+Usage: python tournament.py [--games N] [--modes easy medium hard] [--player bot|random]
+                            [--pieces uniform|bag|history] [--workers N] [--seed N] [--csv FILE]
+"""
+import argparse
+import csv
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from bot import Bot
+from engine import Action, GameMode, GameState
+from game_loop import percentile
+from pieces import generators
+
+key_interval = 50  # Milliseconds per keypress the player can manage
+# Points for clearing 0-4 rows at once under each rule; 'game' is the engine's own
+scoring_rules = {
+    'game': (0, 5, 20, 30, 40),
+    'nes': (0, 40, 100, 300, 1200),
+    'lines': (0, 1, 2, 3, 4),
+}
+fields = ['game', 'mode', 'pieces_policy', 'seed', 'score', 'pieces', 'lines', 'ticks', 'seconds',
+          'out_of_reach', 'singles', 'doubles', 'triples', 'tetrises']
+
+
+class RandomPlayer:
+    """Scripted player: a random number of turns and a random slide per piece"""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def plan(self, game):
+        slide = self.rng.choice((Action.LEFT, Action.RIGHT))
+        return [Action.ROTATE] * self.rng.randrange(4) + [slide] * self.rng.randrange(6)
+
+
+# Per-process state set up by _init_worker
+worker_player = None
+worker_depth = 1
+
+
+def _init_worker(player, depth):
+    global worker_player, worker_depth
+    worker_player, worker_depth = player, depth
+
+
+def play_game(job):
+    """Play one game to the end or max_pieces and return its CSV row"""
+    index, mode, game_seed, player_seed, max_pieces, policy = job
+    game = GameState(seed=game_seed, policy=policy)
+    keys = mode.value // key_interval
+    if worker_player == 'bot':
+        player = Bot(depth=worker_depth, keys_per_row=keys)
+    else:
+        player = RandomPlayer(player_seed)
+    clears = [0] * 5
+    planned = None
+    plan = []
+    ticks = 0
+    while not game.game_over and game.pieces < max_pieces:
+        if planned != game.pieces:
+            planned = game.pieces
+            plan = player.plan(game)
+        for action in plan[:keys]:
+            game.step(action)
+        del plan[:keys]
+        clears[game.step(Action.DOWN)] += 1
+        ticks += 1
+    return {
+        'game': index, 'mode': mode.name, 'pieces_policy': policy, 'seed': game_seed, 'score': game.score,
+        'pieces': game.pieces, 'lines': game.lines, 'ticks': ticks,
+        'seconds': ticks * mode.value / 1000,
+        'out_of_reach': player.out_of_reach if worker_player == 'bot' else 0,
+        'singles': clears[1], 'doubles': clears[2], 'triples': clears[3], 'tetrises': clears[4],
+    }
+
+
+def make_jobs(games, modes, seed=0, max_pieces=500, policy='uniform'):
+    """One job per game and mode, each game with its own game and player seeds
+
+    Every mode plays the same seeds, so modes are compared on identical
+    piece sequences.
+    """
+    jobs = []
+    for index, child in enumerate(np.random.SeedSequence(seed).spawn(games)):
+        game_seed, player_seed = (int(value) for value in child.generate_state(2, np.uint64))
+        jobs.extend((index, mode, game_seed, player_seed, max_pieces, policy) for mode in modes)
+    return jobs
+
+
+def run_tournament(jobs, player='bot', depth=1, workers=None, on_result=None):
+    """Play jobs in a pool of workers, calling on_result as each game finishes"""
+    results = []
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(player, depth)) as pool:
+        for result in pool.imap_unordered(play_game, jobs):
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results
+
+
+def rule_score(result, points):
+    """Score of a finished game under another scoring rule"""
+    clears = (0, result['singles'], result['doubles'], result['triples'], result['tetrises'])
+    return sum(count * value for count, value in zip(clears, points))
+
+
+def summarize(results):
+    """Per-mode summary lines for a list of results"""
+    lines = []
+    for mode in GameMode:
+        games = [result for result in results if result['mode'] == mode.name]
+        if not games:
+            continue
+        scores = [result['score'] for result in games]
+        pieces = [result['pieces'] for result in games]
+        cleared = [result['lines'] for result in games]
+        lines.append(f"{mode.name} ({len(games)} games, {mode.value // key_interval} keys per row, "
+                     f"{statistics.fmean(result['out_of_reach'] for result in games):.1f} placements "
+                     f"out of reach per game)")
+        lines.append(f"  score: mean {statistics.fmean(scores):.1f}, "
+                     f"stdev {statistics.pstdev(scores):.1f}, p10 {percentile(scores, 0.1)}, "
+                     f"median {percentile(scores, 0.5)}, p90 {percentile(scores, 0.9)}, "
+                     f"max {max(scores)}")
+        lines.append(f"  pieces: mean {statistics.fmean(pieces):.1f}, "
+                     f"median {percentile(pieces, 0.5)}, max {max(pieces)}")
+        lines.append(f"  lines: mean {statistics.fmean(cleared):.1f}, clears "
+                     + ", ".join(f"{name} {sum(result[name] for result in games)}"
+                                 for name in fields[-4:]))
+        lines.append("  mean score by rule: "
+                     + ", ".join(f"{name} {statistics.fmean(rule_score(result, points) for result in games):.1f}"
+                                 for name, points in scoring_rules.items()))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless self-play tournament")
+    parser.add_argument('--games', type=int, default=100, help="games per mode")
+    parser.add_argument('--modes', nargs='+', default=[mode.name.lower() for mode in GameMode],
+                        choices=[mode.name.lower() for mode in GameMode])
+    parser.add_argument('--player', choices=('bot', 'random'), default='bot')
+    parser.add_argument('--depth', type=int, default=1, help="bot lookahead")
+    parser.add_argument('--pieces', choices=list(generators), default='uniform', help="piece generator")
+    parser.add_argument('--max-pieces', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=None, help="default: every core")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--csv', default='tournament.csv')
+    args = parser.parse_args()
+
+    modes = [GameMode[name.upper()] for name in args.modes]
+    jobs = make_jobs(args.games, modes, args.seed, args.max_pieces, args.pieces)
+    start = time.perf_counter()
+    with open(args.csv, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+        done = 0
+
+        def on_result(result):
+            nonlocal done
+            done += 1
+            writer.writerow(result)
+            print(f"\r{done}/{len(jobs)} games", end='', file=sys.stderr)
+
+        results = run_tournament(jobs, args.player, args.depth, args.workers, on_result)
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+    print('\n'.join(summarize(results)))
+    print(f"{len(results)} games in {elapsed:.1f}s ({len(results) / elapsed:.1f} games/s), "
+          f"written to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""A bounded LRU cache of evaluated results
+
+TranspositionCache holds results evaluated for positions, such as the
+bot's board features, keyed by the board's row tuple. It evicts the least
+recently used entries beyond max_entries or an estimated max_bytes, so a
+long session can't grow it without bound, and counts hits, misses and
+evictions.
+"""
+import sys
+from collections import OrderedDict
+
+
+def deep_sizeof(value):
+    """Rough memory use of a value with the tuples and lists inside it, in bytes"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(deep_sizeof(item) for item in value)
+    return size
+
+
+class TranspositionCache:
+    """LRU map of positions to evaluated results, bounded in entries and bytes"""
+
+    def __init__(self, max_entries=200000, max_bytes=64 << 20, sizeof=deep_sizeof):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.entries = OrderedDict()  # key -> (value, size), least recently used first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """Cached value of key, marked as just used, or default"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, size=None):
+        """Cache a value, evicting the least recently used entries over the limits
+
+        size is the entry's memory use in bytes, estimated with sizeof when
+        not given.
+        """
+        entries = self.entries
+        if size is None:
+            size = self.sizeof(key) + self.sizeof(value)
+        old = entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        entries[key] = (value, size)
+        self.bytes += size
+        while len(entries) > self.max_entries or (self.bytes > self.max_bytes and len(entries) > 1):
+            _, (_, evicted) = entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry; the counters keep running"""
+        self.entries.clear()
+        self.bytes = 0
+
+    def summary(self):
+        """Entries, estimated memory and hit rate so far"""
+        lookups = self.hits + self.misses
+        return (f"cache: {len(self.entries):,} entries, {self.bytes / (1 << 20):.1f} MiB, "
+                f"{self.hits:,} hits / {lookups:,} lookups ({self.hits / max(lookups, 1):.0%}), "
+                f"{self.evictions:,} evictions")
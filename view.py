@@ -0,0 +1,638 @@
+"""Drawing, the window and its input callbacks for Tetris Game.py
+
+The game script keeps the rules, timers and scores and imports this module
+from load_graphics() when a window is about to open, so OpenGL is never
+loaded by game logic. Everything here reads the game's state through `app`,
+the game script's module, which attach() sets.
+"""
+import sys
+import time
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLU import *
+from OpenGL.GLUT import *
+
+from engine import GameMode, rotation_table
+from particles import circle_points
+from profiler import enabled as profiling, instrument, profiler
+from raster import rasterize_segments, rect_segments
+from renderer import create_renderer
+
+app = None  # The game script's module, see attach()
+scenes = {}  # Filled in by attach()
+
+# Precomputed combo circle
+combo_circle = circle_points(72)
+
+# Profiler overlay text, refreshed a couple of times a second (TETRIS_PROFILE=1)
+profiler_overlay_lines = []
+profiler_overlay_time = 0.0
+
+# Incremental redraw: settled blocks and the sidebar live in an offscreen
+# layer, and only the regions that changed are repainted into it
+layer_fbo = None
+layer_buffers = None  # (framebuffer, renderbuffer) of the layer, deleted when it is replaced
+sidebar_state = None  # (score, highest_score, preview queue) last drawn in the layer
+
+renderer = None  # Backend for the current window's GL context, see renderer.py
+grid_origins = (None, None)  # (rows, cell origins) of the settled board last drawn
+
+@lru_cache(maxsize=None)
+def line_points(x1, y1, x2, y2):
+    """Packed (x, y) points of a midpoint line, rasterized once per segment"""
+    points = rasterize_segments([(x1, y1, x2, y2)])
+    points.flags.writeable = False
+    return points
+
+@lru_cache(maxsize=None)
+def outline_points(x, y, width, height):
+    """Packed rectangle outline, rasterized once per (origin, size)"""
+    points = rasterize_segments(rect_segments(x, y, width, height))
+    points.flags.writeable = False
+    return points
+
+# Cell origins and point arrays queued for the current frame, grouped by colour
+cell_batches = {}  # (colour, size) -> [(x, y), ...]
+point_batches = {}
+
+def queue_cell(color, x, y, size):
+    """Queue a size x size cell outline at (x, y) for the next flush_points()"""
+    batch = cell_batches.get((color, size))
+    if batch is None:
+        batch = cell_batches[color, size] = []
+    batch.append((x, y))
+
+def queue_points(color, points):
+    """Queue packed points to be drawn in colour by the next flush_points()"""
+    batch = point_batches.get(color)
+    if batch is None:
+        batch = point_batches[color] = []
+    batch.append(points)
+
+def flush_points():
+    """Submit queued cells, then queued points, with one draw per colour"""
+    global cell_batches, point_batches
+    for (color, size), origins in cell_batches.items():
+        glColor3f(*color)
+        renderer.draw_outlines(np.array(origins, dtype=np.float32), size, size)
+    for color, batch in point_batches.items():
+        if batch:
+            glColor3f(*color)
+            renderer.draw_points(np.concatenate(batch))
+    cell_batches = {}
+    point_batches = {}
+
+# Display lists of drawn strings, least recently used first. Each window has
+# its own GL context, so the cache is emptied whenever a window is created.
+text_lists = OrderedDict()
+text_cache_size = 64
+
+def draw_text(x, y, text, font=None):
+    """Draw a string with its first character at (x, y), in 9x15 unless a font is given
+
+    Each distinct (text, font) is compiled into a display list once, so a
+    label costs two GL calls however long it is, and a changing string like
+    the score is only rebuilt when its value changes.
+    """
+    if font is None:
+        font = GLUT_BITMAP_9_BY_15
+    key = (text, id(font))  # GLUT font handles are unhashable ctypes pointers
+    display_list = text_lists.get(key)
+    if display_list is None:
+        display_list = glGenLists(1)
+        glNewList(display_list, GL_COMPILE)
+        for char in text:
+            glutBitmapCharacter(font, ord(char))
+        glEndList()
+        text_lists[key] = display_list
+        if len(text_lists) > text_cache_size:
+            glDeleteLists(text_lists.popitem(last=False)[1], 1)
+        if profiling:
+            profiler.count_gl(3 + len(text))
+    else:
+        text_lists.move_to_end(key)
+    glRasterPos2f(x, y)
+    glCallList(display_list)
+    if profiling:
+        profiler.count_gl(2)
+main_window = 0  # The one GLUT window, shared by every scene
+scene = None  # Name of the scene in the window, see switch_scene()
+menu_size = (400, 500)
+
+def draw_menu_button(x, y, width, height, text):
+    """Draw a button in the menu"""
+    queue_points((0.5, 0.5, 0.5), outline_points(x, y, width, height))
+    
+    glColor3f(1.0, 1.0, 1.0)
+    text_x = x + (width - len(text) * 9) // 2  # Center text
+    text_y = y + (height - 15) // 2
+    draw_text(text_x, text_y, text)
+
+def display_menu():
+    """Display function for the menu scene"""
+    glClear(GL_COLOR_BUFFER_BIT)
+    glLoadIdentity()
+    menu_width, menu_height = menu_size
+    gluOrtho2D(0, menu_width, 0, menu_height)
+    
+    # Draw title
+    glColor3f(1.0, 1.0, 1.0)
+    title = "TETRIS"
+    draw_text((menu_width - len(title) * 15) // 2, menu_height - 50, title, GLUT_BITMAP_TIMES_ROMAN_24)
+    
+    # Draw buttons
+    button_width = 200
+    button_height = 40
+    start_y = menu_height - 150
+    spacing = 60
+    
+    buttons = [
+        "Start New Game",
+        f"Easy Mode {'[Selected]' if app.current_mode == GameMode.EASY else ''}",
+        f"Medium Mode {'[Selected]' if app.current_mode == GameMode.MEDIUM else ''}",
+        f"Hard Mode {'[Selected]' if app.current_mode == GameMode.HARD else ''}",
+        f"Highest Score: {app.highest_score}",
+        "Exit"
+    ]
+    
+    for i, text in enumerate(buttons):
+        x = (menu_width - button_width) // 2
+        y = start_y - i * spacing
+        draw_menu_button(x, y, button_width, button_height, text)
+    
+    flush_points()
+    glutSwapBuffers()
+
+def handle_menu_mouse(button, state, x, y):
+    """Handle mouse clicks in menu"""
+    
+    if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
+        menu_width, menu_height = menu_size
+        button_width = 200
+        button_height = 40
+        start_y = menu_height - 150
+        spacing = 60
+        
+        # Convert window coordinates
+        y = menu_height - y
+        button_x = (menu_width - button_width) // 2
+        
+        # Check which button was clicked
+        for i in range(6):  # 6 buttons
+            button_y = start_y - i * spacing
+            if (button_x <= x <= button_x + button_width and
+                button_y <= y <= button_y + button_height):
+                if i == 0:  # Start New Game
+                    app.start_game()
+                elif i == 1:  # Easy Mode
+                    app.current_mode = GameMode.EASY
+                    app.load_highest_score()
+                elif i == 2:  # Medium Mode
+                    app.current_mode = GameMode.MEDIUM
+                    app.load_highest_score()
+                elif i == 3:  # Hard Mode
+                    app.current_mode = GameMode.HARD
+                    app.load_highest_score()
+                elif i == 5:  # Exit
+                    glutDestroyWindow(main_window)
+                    sys.exit()
+                
+                glutPostRedisplay()
+                break
+
+def create_window():
+    """Create the game's only window and context, starting on the menu
+
+    The menu, game and game over screens are scenes of this window, so the
+    renderer's buffers, text display lists and the board layer are created
+    once here and reused by every round.
+    """
+    global main_window
+    glutInit()
+    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB)
+    glutInitWindowSize(*menu_size)
+    glutInitWindowPosition(100, 100)
+    main_window = glutCreateWindow(scenes['menu'].title)
+    text_lists.clear()
+    
+    init()
+    create_board_layer()
+    
+    # Callbacks are registered once and pass events on to the current scene
+    glutDisplayFunc(display_scene)
+    glutReshapeFunc(handle_reshape)
+    glutIgnoreKeyRepeat(1)  # Held keys repeat through input_queue instead
+    glutKeyboardFunc(handle_scene_keyboard)
+    glutKeyboardUpFunc(handle_scene_keyboard_up)
+    glutMouseFunc(handle_scene_mouse)
+    switch_scene('menu')
+
+def switch_scene(name):
+    """Show another scene in the window, resized to fit it"""
+    global scene
+    scene = name
+    glutReshapeWindow(*(menu_size if name == 'menu' else (app.window_width, app.window_height)))
+    glutSetWindowTitle(scenes[name].title)
+    glutPostRedisplay()
+
+def display_scene():
+    scenes[scene].display()
+
+def handle_scene_mouse(button, state, x, y):
+    if scenes[scene].mouse is not None:
+        scenes[scene].mouse(button, state, x, y)
+
+def handle_scene_keyboard(key, x, y):
+    if scenes[scene].keyboard is not None:
+        scenes[scene].keyboard(key, x, y)
+
+def handle_scene_keyboard_up(key, x, y):
+    if scenes[scene].keyboard_up is not None:
+        scenes[scene].keyboard_up(key, x, y)
+
+
+def draw_button(button):
+    """Draw a button with text"""
+    glColor3f(1.0, 1.0, 1.0)  # Changed to white for better visibility
+    
+    # Draw button rectangle outline
+    x, y = button['x'], button['y']
+    
+    # Draw more points for thicker border
+    for offset in range(2):
+        queue_points((1.0, 1.0, 1.0), outline_points(x - offset, y - offset,
+                                                     app.button_width + 2 * offset,
+                                                     app.button_height + 2 * offset))
+    
+    # Draw button text
+    draw_text(x + 10, y + app.button_height//2 + 5, button['text'])  # Adjusted text position
+
+
+def draw_block(x, y):
+    """Draw a block using midpoint line algorithm"""
+    screen_x = x * app.cell_size
+    screen_y = app.window_height - ((y + 1) * app.cell_size + app.top_bar_height)  # Added +1 to fix offset
+    
+    queue_cell((0.0, 1.0, 0.0), screen_x, screen_y, app.cell_size)  # Green color
+
+def draw_ghost_block(x, y):
+    """Draw a cell of the ghost piece, dimmer than a block"""
+    screen_x = x * app.cell_size
+    screen_y = app.window_height - ((y + 1) * app.cell_size + app.top_bar_height)
+    queue_cell((0.0, 0.35, 0.0), screen_x, screen_y, app.cell_size)
+
+@lru_cache(maxsize=None)
+def preview_offsets(piece_id):
+    """Sidebar offsets of the cells of a piece's spawn orientation, bottom row at 0"""
+    piece = rotation_table[piece_id][0]
+    size = app.preview_cell_size
+    # Reverse rows for top-down display
+    return tuple((col_idx * size, (piece.height - 1 - row_idx) * size) for col_idx, row_idx in piece.cells)
+
+def draw_piece_preview(piece_id, start_x, start_y):
+    """Draw piece preview in sidebar"""
+    for dx, dy in preview_offsets(piece_id):
+        queue_cell((0.0, 1.0, 0.0), start_x + dx, start_y + dy, app.preview_cell_size)
+
+@instrument
+def draw_grid():
+    """Draw the game grid"""
+    global grid_origins
+    rows = tuple(app.game.rows)
+    if grid_origins[0] != rows:
+        # New array, so the renderer re-uploads its instance buffer only now
+        cells = np.array(app.game.occupied_cells(), dtype=np.float32).reshape(-1, 2)
+        origins = np.column_stack((cells[:, 0] * app.cell_size,
+                                   app.window_height - ((cells[:, 1] + 1) * app.cell_size + app.top_bar_height)))
+        grid_origins = (rows, origins)
+    glColor3f(0.0, 1.0, 0.0)
+    renderer.draw_outlines(grid_origins[1], app.cell_size, app.cell_size, static=True)
+
+def draw_sidebar_border():
+    """Draw the line between the board and the sidebar"""
+    x = app.window_width - app.sidebar_width
+    queue_points((1.0, 1.0, 1.0), line_points(x, 0, x, app.window_height))  # Changed to white for better visibility
+
+@instrument
+def draw_sidebar():
+    """Draw the sidebar with the preview queue of upcoming pieces"""
+    # Draw sidebar background border
+    draw_sidebar_border()
+    
+    # Draw "Next Piece" text
+    glColor3f(1.0, 1.0, 1.0)
+    draw_text(app.window_width - app.sidebar_width + 20, app.window_height - 30, f"Score: {app.game.score}")
+    
+    draw_text(app.window_width - app.sidebar_width + 20, app.window_height - 60, f"Highest Score: {app.highest_score}")
+    
+    # Draw "Next Piece" text
+    draw_text(app.window_width - app.sidebar_width + 20, app.window_height - 100,
+              "Next Piece:" if app.preview_count == 1 else "Next Pieces:")
+    
+    # Draw the preview queue, soonest first, each piece under the one before
+    preview_x = app.window_width - app.sidebar_width + 40
+    preview_y = app.window_height - 180
+    for piece_id in app.game.preview(app.preview_count):
+        draw_piece_preview(piece_id, preview_x, preview_y)
+        preview_y -= app.preview_cell_size * 2.5
+    
+    # Draw buttons
+    draw_button(app.pause_button)
+    draw_button(app.restart_button)
+
+@instrument
+def draw_current_piece():
+    """Draw the currently falling piece, over a dim ghost where it would land"""
+    landing_y = app.game.landing_row()
+    if landing_y != app.game.piece_y and not app.game.game_over:
+        for col_idx, row_idx in app.game.piece.cells:
+            draw_ghost_block(app.game.piece_x + col_idx, landing_y + row_idx)
+    for col_idx, row_idx in app.game.piece.cells:
+        draw_block(app.game.piece_x + col_idx, app.game.piece_y + row_idx)
+
+def handle_mouse(button, state, x, y):
+    """Handle mouse clicks"""
+    if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
+        # Convert window coordinates
+        y = app.window_height - y
+        
+        # Check pause button
+        if (app.pause_button['x'] <= x <= app.pause_button['x'] + app.button_width and
+            app.pause_button['y'] <= y <= app.pause_button['y'] + app.button_height):
+            app.toggle_pause()
+        
+        # Check restart button
+        if (app.restart_button['x'] <= x <= app.restart_button['x'] + app.button_width and
+            app.restart_button['y'] <= y <= app.restart_button['y'] + app.button_height):
+            app.restart_game()
+            if scene == 'game_over':  # Restarted before game_over_delay ran out
+                switch_scene('game')
+        
+        glutPostRedisplay()
+
+@instrument
+def draw_combo_effect():
+    """Draw combo blast effect"""
+    if app.combo_effect_timer > 0:
+        # Create a pulsing effect
+        remaining = app.combo_effect_timer / app.combo_effect_duration
+        alpha = remaining  # Fade out over time
+        glColor4f(1.0, 1.0, 0.0, alpha)
+        
+        center_x = (app.grid_width * app.cell_size) / 2
+        center_y = app.window_height / 2
+        radius = (1.0 - remaining) * 150  # Expanding radius
+        
+        # Draw expanding circle using points
+        center = np.array((center_x, center_y), dtype=np.float32)
+        renderer.draw_points(combo_circle * np.float32(radius) + center)
+
+@instrument
+def draw_celebration_effect():
+    """Draw celebration effect for high score"""
+    glPointSize(2.0)
+    if app.celebration_particles.count:
+        renderer.draw_points(app.celebration_particles.vertices(), app.celebration_particles.colors())
+
+def create_board_layer():
+    """Create the offscreen layer for the settled board and sidebar, replacing any old one"""
+    global layer_fbo, layer_buffers
+    layer_fbo = None
+    app.mark_full_repaint()
+    if layer_buffers is not None:
+        glDeleteFramebuffers(1, [layer_buffers[0]])
+        glDeleteRenderbuffers(1, [layer_buffers[1]])
+        layer_buffers = None
+    if not glGenFramebuffers:  # No framebuffer objects, repaint everything every frame
+        return
+    fbo = glGenFramebuffers(1)
+    color_buffer = glGenRenderbuffers(1)
+    layer_buffers = (fbo, color_buffer)
+    glBindRenderbuffer(GL_RENDERBUFFER, color_buffer)
+    glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, app.window_width, app.window_height)
+    glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+    glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, color_buffer)
+    if glCheckFramebufferStatus(GL_FRAMEBUFFER) == GL_FRAMEBUFFER_COMPLETE:
+        layer_fbo = fbo
+    glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+def update_board_layer():
+    """Repaint only the changed regions of the offscreen layer"""
+    global sidebar_state
+    state = (app.game.score, app.highest_score, tuple(app.game.preview(app.preview_count)))
+    if not (app.layer_needs_full_repaint or app.dirty_cells or state != sidebar_state):
+        return
+    
+    glBindFramebuffer(GL_FRAMEBUFFER, layer_fbo)
+    glViewport(0, 0, app.window_width, app.window_height)
+    if app.layer_needs_full_repaint:
+        glClear(GL_COLOR_BUFFER_BIT)
+        draw_grid()
+        draw_sidebar()
+    else:
+        # Newly locked cells are only added on top of what is already there
+        for x, y in app.dirty_cells:
+            draw_block(x, y)
+        draw_sidebar_border()  # Keep it on top of cells drawn against it
+        if state != sidebar_state:
+            # Start right of the border line, whose 2px points straddle it
+            sidebar_x = app.window_width - app.sidebar_width + 2
+            glEnable(GL_SCISSOR_TEST)
+            glScissor(sidebar_x, 0, app.window_width - sidebar_x, app.window_height)
+            glClear(GL_COLOR_BUFFER_BIT)
+            glDisable(GL_SCISSOR_TEST)
+            draw_sidebar()
+    flush_points()
+    glBindFramebuffer(GL_FRAMEBUFFER, 0)
+    glViewport(0, 0, *app.viewport_size)
+    
+    app.dirty_cells.clear()
+    app.layer_needs_full_repaint = False
+    sidebar_state = state
+
+def draw_board_layer():
+    """Copy the offscreen layer to the window"""
+    glBindFramebuffer(GL_READ_FRAMEBUFFER, layer_fbo)
+    glBlitFramebuffer(0, 0, app.window_width, app.window_height,
+                      0, 0, app.viewport_size[0], app.viewport_size[1],
+                      GL_COLOR_BUFFER_BIT, GL_NEAREST)
+    glBindFramebuffer(GL_READ_FRAMEBUFFER, 0)
+
+def handle_reshape(width, height):
+    """Handle window resize and expose"""
+    app.viewport_size = (width, height)
+    glViewport(0, 0, width, height)
+    app.mark_full_repaint()
+
+@instrument
+def display():
+    """Display function"""
+    glClear(GL_COLOR_BUFFER_BIT)
+    glLoadIdentity()
+    gluOrtho2D(0, app.window_width, 0, app.window_height)
+    
+    # Draw game elements
+    if layer_fbo is not None:
+        update_board_layer()
+        draw_board_layer()
+        draw_current_piece()
+        draw_sidebar_border()  # Drawn over the piece, as in a full repaint
+    else:
+        draw_grid()
+        draw_current_piece()
+        draw_sidebar()
+    flush_points()
+    
+    if app.game.score > app.highest_score and not app.game.game_over:
+        # Set celebration timer
+        if app.celebration_timer <= 0:
+            app.celebration_timer = app.celebration_duration
+        
+        # Yellow glow effect
+        glColor3f(1.0, 1.0, 0.0)
+        glPointSize(3.0)
+        draw_text(app.window_width - app.sidebar_width + 20, app.window_height - 90, "New High Score!")
+        glPointSize(2.0)
+        
+        # Draw celebration effect if timer is active
+        if app.celebration_timer > 0:
+            draw_celebration_effect()
+    
+    if app.game.game_over:
+        # Don't update highest_score here, wait until game actually ends
+        temp_highest = app.highest_score  # Use current highest_score for comparison
+        
+        if app.game.score > temp_highest:
+            # Draw celebration effect
+            draw_celebration_effect()
+            
+            # Draw congratulations message with special styling
+            glColor3f(1.0, 1.0, 0.0)  # Yellow color
+            messages = [
+                "GAME OVER",
+                "Congratulations!",
+                f"New High Score: {app.game.score}!",
+                f"Previous Best: {temp_highest}"
+            ]
+            y_pos = app.window_height // 2 + 50
+            
+            for i, msg in enumerate(messages):
+                text_width = len(msg) * (15 if i == 0 else 9)  # Bigger font for GAME OVER
+                x_pos = (app.grid_width * app.cell_size - text_width) // 2
+                
+                if i == 0:  # GAME OVER with special effect
+                    # Draw glowing outline
+                    glPointSize(3.0)
+                    glColor3f(1.0, 0.0, 0.0)  # Red outline
+                    draw_text(x_pos, y_pos, msg, GLUT_BITMAP_TIMES_ROMAN_24)
+                    glPointSize(2.0)
+                else:  # Other messages with different styling
+                    if i == 1:  # Congratulations
+                        glColor3f(1.0, 1.0, 0.0)  # Yellow
+                    else:  # Score messages
+                        glColor3f(0.0, 1.0, 0.0)  # Green
+                    
+                    draw_text(x_pos, y_pos, msg)
+                
+                y_pos -= 30
+        else:
+            # Regular game over message with styling
+            messages = [
+                "GAME OVER",
+                f"Your Score: {app.game.score}",
+                f"Highest Score: {temp_highest}"
+            ]
+            y_pos = app.window_height // 2 + 40
+            
+            for i, msg in enumerate(messages):
+                text_width = len(msg) * (15 if i == 0 else 9)
+                x_pos = (app.grid_width * app.cell_size - text_width) // 2
+                
+                if i == 0:  # GAME OVER with special effect
+                    glPointSize(3.0)
+                    glColor3f(1.0, 0.0, 0.0)
+                    draw_text(x_pos, y_pos, msg, GLUT_BITMAP_TIMES_ROMAN_24)
+                    glPointSize(2.0)
+                else:
+                    glColor3f(1.0, 1.0, 1.0)
+                    draw_text(x_pos, y_pos, msg)
+                
+                y_pos -= 30
+    
+    elif app.paused:
+        glColor3f(1.0, 1.0, 0.0)
+        text = "PAUSED"
+        text_width = len(text) * 15
+        x_pos = (app.grid_width * app.cell_size - text_width) // 2
+        draw_text(x_pos, app.window_height // 2, text, GLUT_BITMAP_TIMES_ROMAN_24)
+    
+    if app.combo_effect_timer > 0:
+        draw_combo_effect()
+    
+    if profiling:
+        draw_profiler_overlay()
+        profiler.end_frame()
+    
+    glutSwapBuffers()
+    app.input_queue.presented()
+
+def draw_profiler_overlay():
+    """Draw rolling p50/p95/p99 timings and GL counts in the sidebar, below the buttons"""
+    global profiler_overlay_lines, profiler_overlay_time
+    now = time.perf_counter()
+    if now - profiler_overlay_time > 0.5:
+        stats = profiler.stats()
+        gl_calls = stats.pop('gl_calls_per_frame')
+        vertices = stats.pop('vertices_per_frame')
+        slowest = sorted(stats.items(), key=lambda item: item[1]['p95_ms'], reverse=True)[:7]
+        profiler_overlay_lines = ["ms p50 / p95 / p99"]
+        for name, row in slowest:
+            profiler_overlay_lines.append(
+                f"{name.replace('draw_', '')[:14]} "
+                f"{row['p50_ms']:.2f} / {row['p95_ms']:.2f} / {row['p99_ms']:.2f}")
+        profiler_overlay_lines.append(
+            f"GL/frame {gl_calls['p50']:.0f} calls, {vertices['p50']:.0f} verts")
+        profiler_overlay_time = now
+    
+    glColor3f(0.6, 0.8, 1.0)
+    y_pos = 130
+    for line in profiler_overlay_lines:
+        draw_text(app.window_width - app.sidebar_width + 10, y_pos, line, GLUT_BITMAP_HELVETICA_10)
+        y_pos -= 12
+
+def init():
+    """Initialize OpenGL settings"""
+    global renderer, grid_origins
+    glClearColor(0.0, 0.0, 0.0, 0.0)
+    glPointSize(2.0)
+    renderer = create_renderer()
+    grid_origins = (None, None)
+
+# What each scene of the window draws and which input handlers it takes
+Scene = namedtuple('Scene', 'title display mouse keyboard keyboard_up')
+
+def attach(module):
+    """Draw the state of the game script's module and pass its keys to it"""
+    global app, scenes
+    app = module
+    scenes = {
+        'menu': Scene(b"Tetris Menu", display_menu, handle_menu_mouse, None, None),
+        'game': Scene(b"Tetris", display, handle_mouse, app.handle_keyboard, app.handle_keyboard_up),
+        'game_over': Scene(b"Tetris", display, handle_mouse, None, None),  # Until game_over_delay runs out
+    }
+
+def redisplay():
+    """Draw the current scene again once GLUT is idle"""
+    glutPostRedisplay()
+
+def after(milliseconds, callback):
+    """Call callback(0) from the GLUT main loop in a number of milliseconds"""
+    glutTimerFunc(milliseconds, callback, 0)
+
+def run():
+    """Open the window on the menu and hand control to GLUT"""
+    create_window()
+    glutMainLoop()